@@ -0,0 +1,224 @@
+# @title Distractor Index Creation
+#%%writefile Distractor_Index.py
+'''
+Offline similarity index over entity labels and rdf:type signatures, used to pick
+plausible same-type distractors when the class hierarchy has no siblings to offer.
+Each entity is one sparse row: character n-gram TF-IDF of its label, followed by
+IDF-weighted rdf:type columns (both L2-normalised), so one dot product scores
+  lexical similarity + TYPE_WEIGHT * type similarity.
+Queries for a whole column of answers are answered together with a blocked sparse
+matrix multiply (query block x entity block) and a running top-k per query.
+A candidate that names the answer again is never picked: one whose label contains the
+answer's label (or is contained in it) word for word, e.g. "Anchor Bay" for "Anchor Bay
+Films", or whose n-grams overlap the answer's above MAX_LEXICAL_SIMILARITY.
+Entity IRIs, labels, label keys and the n-gram vocabulary are interned in string arenas
+(Entity_Table.py). save() writes the arenas and the sparse matrix arrays to one file that
+open() memory-maps, so processes that open the same index share its pages.
+'''
+
+import os, re, math
+import numpy as np
+from scipy import sparse
+from Entity_Table import StringArena, write_arrays, map_arrays, arena_arrays
+
+INDEX_MAGIC = b"MCQDIX01"
+
+NGRAM_SIZE = 3           # character n-grams of " label "
+TYPE_WEIGHT = 1.0        # a shared rdf:type outweighs most lexical similarity
+QUERY_BLOCK = 256        # queries per block
+ENTITY_BLOCK = 65536     # entities per block (QUERY_BLOCK x ENTITY_BLOCK float32 scores = 64 MB)
+MAX_LEXICAL_SIMILARITY = 0.5   # n-gram Jaccard above which a label is an alias of the answer
+
+def normalize_label(label):
+    return " ".join(re.sub(r"[^\w\s]", " ", str(label).lower()).split())
+
+def label_key(label):
+    """Labels with the same key are the same answer ("Dreamworks" / "Dream Works")."""
+    return normalize_label(label).replace(" ", "")
+
+def char_ngrams(label):
+    text = f" {normalize_label(label)} "
+    if len(text) <= NGRAM_SIZE:
+        return [text]
+    return [text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)]
+
+def is_alias(label, answer):
+    """True when label names the answer again: word containment either way, or near-identical n-grams."""
+    a, b = f" {normalize_label(label)} ", f" {normalize_label(answer)} "
+    if not a.strip() or not b.strip() or a in b or b in a:
+        return True
+    ga, gb = set(char_ngrams(label)), set(char_ngrams(answer))
+    return len(ga & gb) > MAX_LEXICAL_SIMILARITY * len(ga | gb)
+
+class DistractorIndex:
+    """
+    Top-k similar entities for answers, restricted to other entities (never the
+    answer itself, a same-label duplicate or an alias of the answer, see is_alias).
+    - entities: {iri: label}, one row per entity in IRI order
+    - types: {iri: set of rdf:type IRIs}
+    Built once, written with save() and memory-mapped with open().
+    """
+    def __init__(self, entities, types=None):
+        types = types or {}
+        iris = sorted(entities)
+        labels = [entities[i] for i in iris]
+        self.iris = StringArena.from_strings(iris)
+        self.labels = StringArena.from_strings(labels)
+        self.label_keys = StringArena.from_strings(label_key(l) for l in labels)
+        self.path = None
+
+        # Vocabularies: n-grams first, then rdf:type IRIs in their own columns
+        ngram_col, type_col = {}, {}
+        lex_rows = [[ngram_col.setdefault(g, len(ngram_col)) for g in char_ngrams(l)] for l in labels]
+        type_rows = [[type_col.setdefault(t, len(type_col)) for t in sorted(types.get(iri, ()))] for iri in iris]
+        n = len(iris)
+        self.lex_idf = self._idf(lex_rows, len(ngram_col), n)
+        self.type_idf = self._idf(type_rows, len(type_col), n)
+        self.matrix = sparse.hstack([
+            self._tfidf(lex_rows, self.lex_idf),
+            self._tfidf(type_rows, self.type_idf) * math.sqrt(TYPE_WEIGHT),
+        ]).tocsr()
+        # n-gram -> column as a sorted arena plus a column array (only the type count is kept)
+        grams = sorted(ngram_col)
+        self.ngrams = StringArena.from_strings(grams)
+        self.ngram_cols = np.array([ngram_col[g] for g in grams], dtype=np.int64)
+        self.n_types = len(type_col)
+        self._set_blocks()
+
+    def _set_blocks(self):
+        """Row blocks of the matrix as views of its arrays (slicing a CSR matrix would copy them)."""
+        m, n = self.matrix, self.matrix.shape[0]
+        self.blocks = []
+        for es in range(0, n, ENTITY_BLOCK):
+            ee = min(n, es + ENTITY_BLOCK)
+            lo, hi = m.indptr[es], m.indptr[ee]
+            self.blocks.append((es, sparse.csr_matrix((m.data[lo:hi], m.indices[lo:hi], m.indptr[es:ee + 1] - lo),
+                                                      shape=(ee - es, m.shape[1]))))
+
+    def save(self, path):
+        """Writes the arenas, n-gram columns, IDF weights and CSR arrays with Entity_Table.write_arrays."""
+        m = self.matrix
+        arrays = [("q", np.array([m.shape[0], m.shape[1], self.n_types], dtype=np.int64)),
+                  ("f", m.data), (m.indices.dtype.char, m.indices), (m.indptr.dtype.char, m.indptr),
+                  ("f", self.lex_idf), ("f", self.type_idf), ("q", self.ngram_cols)]
+        for arena in (self.iris, self.labels, self.label_keys, self.ngrams):
+            arrays += arena_arrays(arena)
+        return write_arrays(path, INDEX_MAGIC, arrays)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-maps a saved index; the matrix and arenas are read-only views of the file."""
+        path = os.path.abspath(path)
+        mm, arrays = map_arrays(path, INDEX_MAGIC)
+        (meta, _), (data, _), (indices, _), (indptr, _), (lex_idf, _), (type_idf, _), (ngram_cols, _) = arrays[:7]
+        self = cls.__new__(cls)
+        self.path = path
+        self.matrix = sparse.csr_matrix((np.asarray(data), np.asarray(indices), np.asarray(indptr)),
+                                        shape=(meta[0], meta[1]))
+        self.n_types = meta[2]
+        self.lex_idf, self.type_idf, self.ngram_cols = np.asarray(lex_idf), np.asarray(type_idf), np.asarray(ngram_cols)
+        self.iris, self.labels, self.label_keys, self.ngrams = [
+            StringArena(mm, offsets, pos) for (offsets, _), (_, pos) in zip(arrays[7::2], arrays[8::2])]
+        self._set_blocks()
+        return self
+
+    def __reduce_ex__(self, protocol):
+        # A mapped index travels to worker processes as its path (each maps the same pages)
+        if self.path:
+            return (DistractorIndex.open, (self.path,))
+        return super().__reduce_ex__(protocol)
+
+    def _ngram_col(self, g):
+        i = self.ngrams.find(g)
+        return int(self.ngram_cols[i]) if i >= 0 else -1
+
+    @staticmethod
+    def _idf(rows, n_cols, n_docs):
+        df = np.zeros(n_cols, dtype=np.float64)
+        for cols in rows:
+            df[list(set(cols))] += 1
+        return (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+
+    @staticmethod
+    def _tfidf(rows, idf):
+        """L2-normalised TF-IDF rows (duplicate columns within a row are summed as term counts)."""
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(c) for c in rows])
+        indices = np.fromiter((c for cols in rows for c in cols), dtype=np.int64, count=indptr[-1])
+        m = sparse.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                              shape=(len(rows), len(idf)))
+        m.sum_duplicates()
+        m = m @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).astype(np.float32) @ m
+
+    def _query_rows(self, queries):
+        """Sparse query matrix: the entity's own row for known IRIs, label n-grams otherwise."""
+        self_rows = np.array([self.iris.find(q) for q in queries], dtype=np.int64)
+        known = np.flatnonzero(self_rows >= 0)
+        unknown = np.flatnonzero(self_rows < 0)
+        lex = [[c for c in map(self._ngram_col, char_ngrams(queries[n])) if c >= 0] for n in unknown]
+        text_m = sparse.hstack([self._tfidf(lex, self.lex_idf),
+                                sparse.csr_matrix((len(unknown), self.n_types), dtype=np.float32)])
+        stacked = sparse.vstack([self.matrix[self_rows[known]], text_m]).tocsr()
+        order = np.empty(len(queries), dtype=np.int64)
+        order[known] = np.arange(len(known))
+        order[unknown] = len(known) + np.arange(len(unknown))
+        return stacked[order], self_rows
+
+    def top_k(self, queries, k=3, exclude=None):
+        """
+        For each query (entity IRI, or free label text), the labels of its k most
+        similar entities, best first. `exclude` optionally gives, per query, a label
+        that must not be returned (normally the correct answer).
+        """
+        exclude = exclude or [None] * len(queries)
+        results = []
+        # Over-fetch so that same-label duplicates can be skipped without a second pass
+        fetch = min(len(self.iris), k * 4 + 8)
+        for qs in range(0, len(queries), QUERY_BLOCK):
+            block = queries[qs:qs + QUERY_BLOCK]
+            q_m, self_rows = self._query_rows(block)
+            # Type columns make the scores dense anyway: sparse entities x dense queries
+            q_dense = q_m.toarray().T
+            best_idx = np.empty((len(block), 0), dtype=np.int64)
+            best_score = np.empty((len(block), 0), dtype=np.float32)
+            for es, e_m in self.blocks:
+                scores = (e_m @ q_dense).T
+                own = (self_rows >= es) & (self_rows < es + scores.shape[1])
+                scores[own, self_rows[own] - es] = -np.inf
+                take = min(fetch, scores.shape[1])
+                part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+                best_idx = np.hstack([best_idx, part + es])
+                best_score = np.hstack([best_score, np.take_along_axis(scores, part, axis=1)])
+                if best_idx.shape[1] > fetch:
+                    keep = np.argpartition(-best_score, fetch - 1, axis=1)[:, :fetch]
+                    best_idx = np.take_along_axis(best_idx, keep, axis=1)
+                    best_score = np.take_along_axis(best_score, keep, axis=1)
+            # Deterministic order: score, then entity position
+            for n, q in enumerate(block):
+                order = np.lexsort((best_idx[n], -best_score[n]))
+                results.append(self._pick(q, exclude[qs + n], best_idx[n][order], best_score[n][order], k))
+        return results
+
+    def _pick(self, query, exclude, idx, scores, k):
+        r = self.iris.find(query)
+        answers = [self.labels[r] if r >= 0 else query] + ([exclude] if exclude else [])
+        seen = {label_key(a) for a in answers}
+        picks = []
+        # Candidates stay in score order (rdf:type first); aliases of the answer are skipped
+        for i, s in zip(idx, scores):
+            if s <= 0 or not np.isfinite(s):
+                break
+            lbl = self.label_keys[i]
+            if not lbl or lbl in seen:
+                continue
+            seen.add(lbl)
+            label = self.labels[i]
+            if any(is_alias(label, a) for a in answers):
+                continue
+            picks.append(label)
+            if len(picks) == k:
+                break
+        return picks
\ No newline at end of file
@@ -0,0 +1,227 @@
+# @title Entity Table Creation
+#%%writefile Entity_Table.py
+'''
+Interned entity and label store.
+Strings are kept as one contiguous UTF-8 arena plus an int64 offset array, so a table
+of N strings is two objects instead of N Python strings, and string i is decoded only
+when it is read. An entity's integer id is its position in the sorted IRI arena.
+EntityTable holds the two label maps of MCQ_Core (IRI -> label, fragment -> label) as
+sorted arenas; lookups are binary searches on the encoded bytes.
+Saved tables are memory-mapped read-only, so every worker process that opens the same
+file shares its pages through the OS page cache instead of holding its own copy.
+write_arrays() / map_arrays() store any list of flat arrays the same way (used by the
+distractor index for its sparse matrix).
+'''
+
+import os, mmap
+from array import array
+from collections.abc import Mapping, Sequence
+
+MAGIC = b"MCQENT01"
+
+class StringArena(Sequence):
+    """
+    Immutable sequence of strings: string i is the UTF-8 bytes
+    data[base + offsets[i]:base + offsets[i + 1]].
+    """
+    def __init__(self, data, offsets, base=0):
+        self.data = data          # bytes, or a read-only mmap (slicing either gives bytes)
+        self.offsets = offsets    # array('q') or a memoryview cast to 'q'
+        self.base = base
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets, chunks, end = array("q", [0]), [], 0
+        for s in strings:
+            b = s.encode("utf-8")
+            chunks.append(b)
+            end += len(b)
+            offsets.append(end)
+        return cls(b"".join(chunks), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        return self.data[self.base + self.offsets[i]:self.base + self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError("string index out of range")
+        return str(self.raw(i % len(self)), "utf-8")
+
+    def __iter__(self):
+        data, o, base = self.data, self.offsets, self.base
+        for i in range(len(self)):
+            yield str(data[base + o[i]:base + o[i + 1]], "utf-8")
+
+    def find(self, s):
+        """Index of s in a sorted arena, or -1 (UTF-8 byte order is code point order)."""
+        key = s.encode("utf-8")
+        data, o, base = self.data, self.offsets, self.base
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[base + o[mid]:base + o[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.raw(lo) == key else -1
+
+    def size(self):
+        return self.offsets[-1] - self.offsets[0]
+
+    def nbytes(self):
+        return self.size() + 8 * len(self.offsets)
+
+    def __reduce__(self):
+        # Pickled as one bytes object and one offset array, whatever backs the arena
+        start = self.offsets[0]
+        data = self.data[self.base + start:self.base + self.offsets[-1]]
+        return (StringArena, (data, array("q", (x - start for x in self.offsets))))
+
+def write_arrays(path, magic, arrays):
+    """
+    Writes magic, the array count, (typecode, byte size) per array, then each array's
+    bytes padded to 8 bytes. Arrays are anything with a buffer and an array typecode
+    (array.array, numpy arrays, bytes as 'B').
+    """
+    header = array("q", [len(arrays)])
+    chunks = []
+    for typecode, a in arrays:
+        data = memoryview(a).cast("B")
+        header.extend([ord(typecode), data.nbytes])
+        chunks.append(data)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(magic)
+        f.write(header.tobytes())
+        for data in chunks:
+            f.write(data)
+            f.write(b"\0" * (-data.nbytes % 8))
+    os.replace(tmp, path)
+    return path
+
+def map_arrays(path, magic):
+    """
+    Memory-maps a file of write_arrays(); returns (mmap, [(memoryview cast to the typecode,
+    file position)]). Byte arrays that back a StringArena use the mmap and the position.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    if bytes(view[:len(magic)]) != magic:
+        raise ValueError(f"{path} is not a {magic.decode()} file")
+    pos = len(magic)
+    count = view[pos:pos + 8].cast("q")[0]
+    sizes = view[pos + 8:pos + 8 + 16 * count].cast("q")
+    pos += 8 + 16 * count
+    out = []
+    for i in range(count):
+        typecode, size = chr(sizes[2 * i]), sizes[2 * i + 1]
+        out.append((view[pos:pos + size].cast(typecode), pos))
+        pos += size + (-size % 8)
+    return mm, out
+
+def arena_arrays(arena):
+    """An arena as two write_arrays() entries: offsets (rebased to 0) and data."""
+    start = arena.offsets[0]
+    return [("q", array("q", (x - start for x in arena.offsets))),
+            ("B", arena.data[arena.base + start:arena.base + arena.offsets[-1]])]
+
+class StringMap(Mapping):
+    """Read-only str -> str mapping over two arenas: sorted keys and their values."""
+    def __init__(self, keys, values):
+        self.keys_arena, self.values_arena = keys, values
+
+    @classmethod
+    def from_dict(cls, d):
+        keys = sorted(d)
+        return cls(StringArena.from_strings(keys), StringArena.from_strings(d[k] for k in keys))
+
+    def id_of(self, key):
+        return self.keys_arena.find(key) if isinstance(key, str) else -1
+
+    def __getitem__(self, key):
+        i = self.id_of(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.values_arena[i]
+
+    def __contains__(self, key):
+        return self.id_of(key) >= 0
+
+    def __iter__(self):
+        return iter(self.keys_arena)
+
+    def __len__(self):
+        return len(self.keys_arena)
+
+    def nbytes(self):
+        return self.keys_arena.nbytes() + self.values_arena.nbytes()
+
+class EntityTable:
+    """
+    Interned label maps: `labels` (IRI -> label, entity id = IRI position) and
+    `fragments` (IRI fragment -> label). Built from MCQ_Core's label dicts with
+    from_maps(), written once with save() and memory-mapped with open().
+    """
+    def __init__(self, labels, fragments, path=None):
+        self.labels, self.fragments, self.path = labels, fragments, path
+
+    @classmethod
+    def from_maps(cls, uri_to_label, frag_to_label):
+        return cls(StringMap.from_dict(uri_to_label), StringMap.from_dict(frag_to_label))
+
+    def arenas(self):
+        return [self.labels.keys_arena, self.labels.values_arena,
+                self.fragments.keys_arena, self.fragments.values_arena]
+
+    def save(self, path):
+        """Writes MAGIC, the arena count, (n, data bytes) per arena, then each arena's offsets and data."""
+        arenas = self.arenas()
+        header = array("q", [len(arenas)])
+        for a in arenas:
+            header.extend([len(a), a.size()])
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(header.tobytes())
+            for a in arenas:
+                f.write(array("q", a.offsets).tobytes())
+                f.write(a.data[a.base:a.base + a.size()])
+                f.write(b"\0" * (-a.size() % 8))   # keep the next offsets 8-byte aligned
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def open(cls, path):
+        """Memory-maps a saved table; nothing is decoded until it is read."""
+        path = os.path.abspath(path)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        if bytes(view[:8]) != MAGIC:
+            raise ValueError(f"{path} is not an entity table")
+        count = view[8:16].cast("q")[0]
+        sizes = view[16:16 + 16 * count].cast("q")
+        pos, arenas = 16 + 16 * count, []
+        for i in range(count):
+            n, size = sizes[2 * i], sizes[2 * i + 1]
+            offsets = view[pos:pos + 8 * (n + 1)].cast("q")
+            pos += 8 * (n + 1)
+            arenas.append(StringArena(mm, offsets, pos))
+            pos += size + (-size % 8)
+        return cls(StringMap(*arenas[:2]), StringMap(*arenas[2:]), path)
+
+    def __reduce__(self):
+        # A mapped table travels to worker processes as its path (each maps the same pages)
+        if self.path:
+            return (EntityTable.open, (self.path,))
+        return (EntityTable, (self.labels, self.fragments))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def nbytes(self):
+        return self.labels.nbytes() + self.fragments.nbytes()
\ No newline at end of file
@@ -1,11 +1,15 @@
 # Install the dependencies
-!pip install -q owlready2 rdflib pandas
+!pip install -q owlready2 rdflib pandas scipy
 import os
 import urllib.parse
 from owlready2 import get_ontology, sync_reasoner
 from rdflib import Graph, Namespace, RDF, RDFS, OWL
 import pandas as pd
-from google.colab import drive
-drive.mount('/content/drive', force_remount=False)
 
-print("Environment ready. Drive mounted and libraries installed.")
\ No newline at end of file
+# Google Drive is only mounted inside Colab; elsewhere ontologies are read from local paths
+try:
+    from google.colab import drive
+    drive.mount('/content/drive', force_remount=False)
+    print("Environment ready. Drive mounted and libraries installed.")
+except ImportError:
+    print("Environment ready. Libraries installed (not in Colab, Drive not mounted).")
\ No newline at end of file
@@ -0,0 +1,839 @@
+# @title MCQ Core Creation
+#%%writefile MCQ_Core.py
+'''
+Label resolution, distractor generation and the per-family MCQ generators used by
+PartC_MCQ_generator.py. Kept free of notebook globals so that the batch and pipelined
+runners can call the same generators on in-memory frames.
+'''
+
+import re, os, json, random, math, pandas as pd
+from Distractor_Index import DistractorIndex, label_key
+from Star_Join import load_patterns, is_data_role, composite_file
+from Utility_Files import stable_hash, shard_of
+from Template_Registry import compile_registry
+RANDOM_SEED = 42
+SUBCLASS_OF = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+
+MCQ_LIMITS = {
+    "taxonomy": 100,
+    "role": 80,
+    "chain": 60,
+    "sibling": 80,
+    "data": 80,
+    "director": 100,
+    "actor": 100,
+    "release": 80
+}
+
+# subject_id / answer_id are the IRIs the question is about and answered by ("" for literal answers)
+# distractors is the readable comma-joined text; distractor_list keeps the exact labels (JSON list),
+# since labels can contain commas ("Hello, Dolly!")
+MCQ_COLUMNS = ["question", "correct_answer", "distractors", "source_template", "subject_id", "answer_id", "relation",
+               "distractor_list"]
+EMPTY_FRAME = pd.DataFrame()
+
+# Label maps (filled in place so every importer sees the same dicts)
+uri_to_label, frag_to_label = {}, {}
+# Interned, memory-mapped replacement for both maps (see Entity_Table.py)
+entity_table = None
+
+def use_entity_table(table):
+    """Reads labels from an EntityTable instead of the label dicts (None goes back to the dicts)."""
+    global entity_table
+    entity_table = table
+    uri_to_label.clear()
+    frag_to_label.clear()
+    similar_labels.clear()
+
+def label_maps():
+    """(IRI -> label, fragment -> label) currently in use."""
+    if entity_table is not None:
+        return entity_table.labels, entity_table.fragments
+    return uri_to_label, frag_to_label
+
+def uri_fragment(s_str: str) -> str:
+    return s_str.split("#")[-1] if "#" in s_str else s_str.rstrip("/").split("/")[-1]
+
+def build_label_maps(g, found_label):
+    """Builds uri_to_label / frag_to_label for every subject of the graph."""
+    use_entity_table(None)
+    # Sorted: the map (and the distractor index built from it) must not depend on the hash seed
+    for s in sorted(set(g.subjects()), key=str):
+        set_label(str(s), subject_label(g, s, found_label))
+
+def subject_label(g, s, found_label):
+    """Label literal of one subject: found_label, then rdfs:label, then its first string value (or None)."""
+    from rdflib import RDFS
+    label_literal = None
+    try:
+        for lit in g.objects(s, found_label):
+            label_literal = str(lit)
+            break
+    except Exception:
+        pass
+    if not label_literal:
+        for lit in g.objects(s, RDFS.label):
+            label_literal = str(lit)
+            break
+    if not label_literal:
+        for _, o in g.predicate_objects(s):
+            try:
+                if isinstance(o, str) or (hasattr(o, "datatype") and o.datatype and "string" in str(o.datatype)):
+                    label_literal = str(o)
+                    break
+            except Exception:
+                continue
+    return label_literal
+
+def set_label(s_str, label_literal):
+    """Records the display label of one subject URI (falls back to its fragment)."""
+    frag = uri_fragment(s_str)
+    uri_to_label[s_str] = label_literal or frag
+    frag_to_label[frag] = label_literal or frag
+
+#namespace filters
+BAD_NAMESPACES = (
+    "http://www.w3.org/",
+    "https://www.w3.org/",
+    "rdf-syntax-ns#",
+    "rdf-schema#",
+    "owl#",
+    "xsd#",
+)
+
+def is_system_uri(s: str) -> bool:
+    if not s:
+        return True
+    s = str(s)
+    return any(ns in s for ns in BAD_NAMESPACES)
+
+# helper function to clean ontology labels for natural text
+def clean_label_text(label: str) -> str:
+    """
+    Cleans and normalizes ontology labels for natural language use. For example:
+    - Removes punctuation and underscores.
+    - Fixes camelCase and excessive capitalization.
+    - Converts starting 'A' or 'An' to lowercase during mid-sentence.
+    """
+    if not label:
+        return ""
+    s = str(label).strip()
+    # Replace underscores, hyphens with spaces
+    s = re.sub(r"[_\-]+", " ", s)
+    # Remove stray symbols but keep apostrophes and hyphens
+    s = re.sub(r"[^\w\s'\-]", "", s)
+    # Split camelCase (e.g. ComicBookHero -> Comic Book Hero)
+    s = re.sub(r"(?<!^)(?=[A-Z])", " ", s)
+    # Normalize spaces
+    s = re.sub(r"\s+", " ", s).strip()
+    # Lowercase first 'A' or 'An' if sentence fragment
+    if re.match(r"^(A|An)\s+[A-Z]", s):
+        s = s[0].lower() + s[1:]
+    # Title-case only proper labels 
+    words = s.split()
+    if len(words) <= 3:
+        s = s.title()
+    else:
+        # Capitalize first letter only for longer ones
+        s = s[:1].lower() + s[1:] if s and s[0].isupper() else s
+    return s.strip()
+
+
+# label resolver
+def resolve_label(val: str) -> str:
+    if val is None:
+        return ""
+    val = str(val).strip()
+    if is_system_uri(val):
+        return ""
+    if re.search(r"\w\s+\w", val):
+        return val
+    if val.startswith(("http://", "https://", "urn:")):
+        candidate = label_maps()[0].get(val, val.split("#")[-1] if "#" in val else val.split("/")[-1])
+        return "" if is_system_uri(candidate) else candidate
+    frag = val.split("#")[-1] if "#" in val else val.split("/")[-1]
+    candidate = label_maps()[1].get(frag, val)
+    # return "" if is_system_uri(candidate) else candidate
+    return "" if is_system_uri(candidate) else clean_label_text(candidate)
+
+def clean(x):
+    return str(x).strip() if pd.notna(x) else ""
+
+def is_numeric(s):
+    try:
+        float(str(s))
+        return True
+    except:
+        return False
+
+def verbalize_property(p):
+    """
+    Convert property name to natural language.
+    """
+    if not p:
+        return ""
+    p = p.replace("_", " ").strip()
+
+    # Remove common prefixes
+    if p.startswith("has "):
+        return p[4:].strip().lower()
+    if p.startswith("is "):
+        return p[3:].strip().lower()
+
+    # Handling camelCase
+    def camel_to_words(t):
+        return re.sub(r"(?<!^)(?=[A-Z])", " ", t).lower()
+
+    if p.startswith("has"):
+        return camel_to_words(p[3:])
+    if p.startswith("is"):
+        return camel_to_words(p[2:])
+
+    return camel_to_words(p).lower()
+
+def pretty_prop(raw_val: str) -> str:
+    """
+    Clean, human-readable property phrase
+    """
+    s = clean(raw_val)
+    candidate = resolve_label(s)
+
+    if candidate.startswith(("http://","https://")) or s.startswith(("http://","https://")):
+        src = s if s.startswith(("http://","https://")) else candidate
+        candidate = src.split("#")[-1] if "#" in src else src.rstrip("/").split("/")[-1]
+
+    # Remove technical terms
+    candidate = re.sub(r"\bobject\s*property\b", "", candidate, flags=re.I)
+    candidate = re.sub(r"\bdata\s*type\s*property\b", "", candidate, flags=re.I)
+    candidate = re.sub(r"\bdatatype\s*property\b", "", candidate, flags=re.I)
+    candidate = re.sub(r"\bowl\b", "", candidate, flags=re.I)
+    candidate = re.sub(r"\bis\b", "", candidate, flags=re.I).strip()
+
+    return verbalize_property(candidate)
+
+# Loading CSVs
+RELATION_FILES = {
+    "taxonomy": "taxonomy_relations.csv",
+    "role": "role_relations.csv",
+    "chain": "relational_chains.csv",
+    "sibling": "sibling_classes.csv",
+    "data": "data_property_facts.csv",
+    "director": "director_relations.csv",
+    "actor": "actor_relations.csv",
+    "release": "release_date_relations.csv",
+}
+
+def read_csv_if_exists(f):
+    return pd.read_csv(f) if os.path.exists(f) else pd.DataFrame()
+
+def load_frames(folder="."):
+    """Reads every relation CSV written by PartB_Relation_extractor.py (composite patterns included)."""
+    frames = {key: read_csv_if_exists(os.path.join(folder, name)) for key, name in RELATION_FILES.items()}
+    for name in COMPOSITE_PATTERNS:
+        frames[name] = read_csv_if_exists(os.path.join(folder, composite_file(name)))
+    return frames
+
+# Maintaining hierarchy for better distractors
+parent_of, children_of = {}, {}
+
+def add_hierarchy_edge(child, parent):
+    # New sets instead of in-place adds, so readers iterating the old set are unaffected
+    if child and parent:
+        parent_of[child] = parent_of.get(child, set()) | {parent}
+        children_of[parent] = children_of.get(parent, set()) | {child}
+
+def build_hierarchy(t):
+    """Rebuilds parent_of / children_of from the taxonomy frame."""
+    parent_of.clear()
+    children_of.clear()
+    if not t.empty:
+        for _, row in t.iterrows():
+            child = resolve_label(clean(row.get("child_label") or row.get("child")))
+            parent = resolve_label(clean(row.get("parent_label") or row.get("parent")))
+            add_hierarchy_edge(child, parent)
+
+def get_ancestors(lbl, max_hops=10):
+    """Get all ancestors level by level."""
+    visited = set()
+    current_level = set(parent_of.get(lbl, set()))
+    all_ancestors = []
+    hops = 0
+
+    while current_level and hops < max_hops:
+        all_ancestors.append(sorted(current_level))
+        visited |= current_level
+        next_level = set()
+        for p in current_level:
+            next_level.update(parent_of.get(p, set()))
+        current_level = next_level - visited
+        hops += 1
+
+    return all_ancestors
+
+def hierarchical_sibling_distractors(lbl, k=3):
+    """
+    Generate distractors from siblings,
+    then cousins,
+    then higher levels.
+    """
+    lbl = clean(lbl)
+    picks = []
+    seen = {lbl}
+
+    # Level 1: Direct siblings (sets are walked sorted so the shuffles below are reproducible)
+    for p in sorted(parent_of.get(lbl, set())):
+        sibs = [c for c in sorted(children_of.get(p, set())) if c not in seen and c != lbl]
+        random.shuffle(sibs)
+        for s in sibs:
+            if len(picks) < k:
+                picks.append(resolve_label(s))
+                seen.add(s)
+            else:
+                return picks
+
+    # Level 2+: higher level
+    for level in get_ancestors(lbl, 10):
+        candidates = []
+        for anc in level:
+            # Get siblings of this ancestor
+            for grand_parent in sorted(parent_of.get(anc, set())):
+                candidates += [c for c in sorted(children_of.get(grand_parent, set()))
+                             if c not in seen and c != anc]
+
+        random.shuffle(candidates)
+        for s in candidates:
+            if len(picks) < k:
+                picks.append(resolve_label(s))
+                seen.add(s)
+            else:
+                return picks
+
+    return picks[:k]
+
+def numeric_distractors_from_pool(correct, pool, k=3):
+    """
+    Generate numeric distractors close to the correct value
+    """
+    try:
+        c = float(correct)
+    except:
+        return []
+
+    nums = []
+    for v in pool:
+        try:
+            fv = float(v)
+            if not math.isclose(fv, c):
+                nums.append(fv)
+        except:
+            continue
+
+    # Sort by distance from correct answer
+    nums = sorted(set(nums), key=lambda x: abs(x - c))
+    chosen = [str(int(x)) if float(x).is_integer() else str(x) for x in nums[:k]]
+
+    # Add extra distractors
+    for d in (1, 2, 3, 5, 10, 50, 100):
+        if len(chosen) >= k:
+            break
+        for v in (c + d, c - d):
+            if v > 0:  
+                s = str(int(v)) if float(v).is_integer() else str(v)
+                if s != str(correct) and s not in chosen:
+                    chosen.append(s)
+                    if len(chosen) == k:
+                        break
+
+    return chosen[:k]
+
+# Templates & Distractors
+QUESTION_PATTERNS = {}
+
+def load_templates(path="question_templates.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def set_templates(patterns):
+    """Sets and compiles the templates (after set_composite_patterns(), whose keys they must cover)."""
+    QUESTION_PATTERNS.clear()
+    QUESTION_PATTERNS.update(patterns)
+    compile_templates()
+
+# Composite patterns (composite_patterns.json, next to question_templates.json)
+COMPOSITE_PATTERNS = {}
+
+def load_composite_patterns(path="composite_patterns.json"):
+    """Composite patterns, or none when the file has not been generated."""
+    return load_patterns(path) if os.path.exists(path) else {}
+
+def set_composite_patterns(patterns):
+    COMPOSITE_PATTERNS.clear()
+    COMPOSITE_PATTERNS.update(patterns)
+    FAMILY_INPUTS["composite"] = list(patterns)
+
+# Slots each template family can fill. The answer is never one of them.
+TEMPLATE_FIELDS = {
+    "taxonomy_relations": ["child"],
+    "role_relations": ["subject", "property", "prop_text"],
+    "relational_chains": ["x", "y", "prop1", "prop2", "prop1_text", "prop2_text"],
+    "sibling_classes": ["entity1", "parent"],
+    "data_property_facts": ["subject", "property"],
+    "director_questions": ["movie"],
+    "actor_questions": ["movie"],
+    "release_questions": ["movie"],
+}
+
+def template_fields(patterns=None):
+    """TEMPLATE_FIELDS plus the composite patterns: their center and every role but the answer."""
+    fields = dict(TEMPLATE_FIELDS)
+    for name, pattern in (COMPOSITE_PATTERNS if patterns is None else patterns).items():
+        fields[name] = [pattern["center"]] + [r for r in pattern["roles"] if r != pattern["answer"]]
+    return fields
+
+TEMPLATES = None   # TemplateRegistry compiled from QUESTION_PATTERNS
+
+def compile_templates():
+    """Compiles and checks QUESTION_PATTERNS; raises Template_Registry.TemplateError on a bad template."""
+    global TEMPLATES
+    TEMPLATES = compile_registry(QUESTION_PATTERNS, template_fields(), RANDOM_SEED)
+    return TEMPLATES
+
+def render_questions(key, rows):
+    """
+    Phrases a family's rows in one batch. The generators store the slot values where
+    the question text goes; each row's template variant is chosen from its ids.
+    """
+    texts = TEMPLATES.render(key, [r[0] for r in rows], [(r[4], r[5], r[1]) for r in rows])
+    for r, text in zip(rows, texts):
+        r[0] = text
+    return rows
+
+def sanitize_distractors(options, answer):
+    """Clean and validate distractors."""
+    clean_opts = []
+    for o in options:
+        o = resolve_label(o)
+        # "Henri-Jacques Huet" is the answer "Henri Jacques Huet" spelled differently
+        if not o or o == answer or label_key(o) == label_key(answer):
+            continue
+        if is_system_uri(o):
+            continue
+        if len(o) > 100:  # Skipping overly long labels
+            continue
+        if o not in clean_opts:
+            clean_opts.append(o)
+    return clean_opts[:3]
+
+# Similarity index for same-type distractors (see Distractor_Index.py)
+distractor_index = None
+similar_labels = {}   # answer label -> most similar entity labels, filled per answer column
+
+def entity_types(g):
+    """{subject IRI: set of rdf:type IRIs} from the graph."""
+    types = {}
+    from rdflib import RDF
+    for s, t in g.subject_objects(RDF.type):
+        types.setdefault(str(s), set()).add(str(t))
+    return types
+
+def build_distractor_index(types):
+    """Indexes every labelled entity by label n-grams and rdf:type (call after the label maps)."""
+    global distractor_index
+    entities = {}
+    # IRI order, so score ties break the same way however the labels were collected
+    for iri in sorted(label_maps()[0]):
+        lbl = resolve_label(iri)
+        if lbl:
+            entities[iri] = lbl
+    distractor_index = DistractorIndex(entities, types)
+    similar_labels.clear()
+    return distractor_index
+
+def prefetch_similar(answers, k=5):
+    """
+    Looks up the most similar entities for a whole column of answers (IRIs, or label
+    text for literal answers) in one batched index query; results are kept by label.
+    """
+    if distractor_index is None:
+        return
+    todo, wanted = {}, set()
+    for a in answers:
+        a = clean(a)
+        lbl = resolve_label(a)
+        if a and lbl and lbl not in similar_labels and lbl not in wanted:
+            todo[a] = lbl
+            wanted.add(lbl)
+    queries = list(todo)
+    for q, found in zip(queries, distractor_index.top_k(queries, k, exclude=[todo[q] for q in queries])):
+        similar_labels[todo[q]] = found
+
+def similar_distractors(answer, picks, k):
+    """Up to k - len(picks) prefetched similar entities for the answer."""
+    vals = [x for x in similar_labels.get(answer, []) if x != answer and x not in picks]
+    return vals[:max(0, k - len(picks))]
+
+# Specialized distractor generators
+def distractors_for_taxonomy(parent, k=3):
+    return hierarchical_sibling_distractors(parent, k)
+
+def distractors_for_sibling(e2, k=3):
+    return hierarchical_sibling_distractors(e2, k)
+
+def distractors_for_role_object(obj, prop, pool, k=3):
+    """
+    Generate distractors for role/object properties
+    """
+    # First hierarchical approach
+    picks = hierarchical_sibling_distractors(obj, k)
+
+    # Then the most similar entities of the same type
+    picks += similar_distractors(obj, picks, k)
+
+    # Then add from pool if needed
+    if len(picks) < k:
+        vals = [x for x in pool if x and x != obj and x not in picks]
+        random.shuffle(vals)
+        picks += vals[:k - len(picks)]
+
+    return picks[:k]
+
+def distractors_for_chain(z, pool, k=3):
+    """
+    Generate distractors for chain questions
+    """
+    picks = hierarchical_sibling_distractors(z, k)
+    picks += similar_distractors(z, picks, k)
+
+    if len(picks) < k:
+        vals = [x for x in pool if x and x != z and x not in picks]
+        random.shuffle(vals)
+        picks += vals[:k - len(picks)]
+
+    return picks[:k]
+
+def distractors_for_data_value(val, prop, pool, k=3):
+    """
+    Generate distractors for data properties
+    """
+    v = str(val)
+
+    # Numeric values
+    if is_numeric(v):
+        return numeric_distractors_from_pool(v, pool, k)
+
+    # String values
+    vals = [str(x).strip() for x in pool
+            if str(x).strip() and str(x).strip() != v and not is_numeric(x)]
+    random.shuffle(vals)
+    return vals[:k]
+
+# MCQ Generation
+def take_rows(df, key):
+    """
+    First MCQ_LIMITS[key] rows of a relation frame. PartB writes its seeded reservoir
+    sample in priority order, so any prefix is already a uniform sample.
+    """
+    return df.head(MCQ_LIMITS[key])
+
+# Sharded runs generate only the rows whose subject belongs to SHARD = (index, count)
+SHARD = None
+
+def set_shard(index=None, count=None):
+    global SHARD
+    SHARD = None if index is None else (index, count)
+
+def owned_rows(df, subject):
+    """Rows of a frame this process generates (all of them unless sharded)."""
+    for _, r in df.iterrows():
+        if SHARD is None or shard_of(clean(r.get(subject)), SHARD[1]) == SHARD[0]:
+            yield r
+
+def seed_row(*parts):
+    """
+    Reseeds the random stream for one question, so its distractors depend only on the
+    row itself, not on the rows generated before it (or on the shard generating it).
+    """
+    random.seed(stable_hash(RANDOM_SEED, *parts))
+
+def add_mcq(rows, q, a, dist, src, subject_id="", answer_id="", relation=""):
+    """q is the question's template slot values until render_questions() phrases it."""
+    rows.append([q, a, ", ".join(dist), src, clean(subject_id), clean(answer_id), clean(relation),
+                 json.dumps(list(dist), ensure_ascii=False)])
+
+# TAXONOMY
+def generate_taxonomy(frames):
+    rows = []
+    df = frames.get("taxonomy", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "taxonomy")
+        for r in owned_rows(df, "child"):
+            child = resolve_label(r.get("child_label") or r.get("child"))
+            parent = resolve_label(r.get("parent_label") or r.get("parent"))
+            if not (child and parent):
+                continue
+            seed_row("taxonomy", child, parent)
+
+            d = sanitize_distractors(distractors_for_taxonomy(parent, 3), parent)
+            if len(d) >= 2:
+                add_mcq(rows, {"child": child}, parent, d, "Taxonomy", r.get("child"), r.get("parent"), SUBCLASS_OF)
+    return render_questions("taxonomy_relations", rows)
+
+# ROLE
+def generate_role(frames):
+    rows = []
+    df = frames.get("role", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "role")
+        pool = [resolve_label(x) for x in df.get("object", df.get("object_label", []))]
+        prefetch_similar(df.get("object", df.get("object_label", [])))
+
+        for r in owned_rows(df, "subject"):
+            subj = resolve_label(r.get("subject") or r.get("subject_label"))
+            prop_raw = r.get("property") or r.get("property_label")
+            obj = resolve_label(r.get("object") or r.get("object_label"))
+            prop_text = pretty_prop(prop_raw)
+
+            if not (subj and obj and prop_text):
+                continue
+            seed_row("role", subj, prop_text, obj)
+
+            q = {"subject": subj, "property": prop_text, "prop_text": prop_text}
+            d = sanitize_distractors(distractors_for_role_object(obj, prop_text, pool, 3), obj)
+            if len(d) >= 2:
+                add_mcq(rows, q, obj, d, "Role Relation", r.get("subject"), r.get("object"), r.get("property"))
+    return render_questions("role_relations", rows)
+
+# CHAIN
+def generate_chain(frames):
+    rows = []
+    df = frames.get("chain", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "chain")
+        pool = [resolve_label(x) for x in df.get("z", df.get("z_label", []))]
+        prefetch_similar(df.get("z", df.get("z_label", [])))
+
+        for r in owned_rows(df, "x"):
+            x = resolve_label(r.get("x") or r.get("x_label"))
+            y = resolve_label(r.get("y") or r.get("y_label"))
+            z = resolve_label(r.get("z") or r.get("z_label"))
+            p1_text = pretty_prop(r.get("prop1") or r.get("prop1_label"))
+            p2_text = pretty_prop(r.get("prop2") or r.get("prop2_label"))
+
+            if not (x and y and z):
+                continue
+            seed_row("chain", x, y, z, p1_text, p2_text)
+
+            q = {"x": x, "y": y, "prop1": p1_text, "prop2": p2_text,
+                 "prop1_text": p1_text, "prop2_text": p2_text}
+            d = sanitize_distractors(distractors_for_chain(z, pool, 3), z)
+            if len(d) >= 2:
+                add_mcq(rows, q, z, d, "Relational Chain", r.get("x"), r.get("z"),
+                        f"{clean(r.get('prop1'))} / {clean(r.get('prop2'))}")
+    return render_questions("relational_chains", rows)
+
+# SIBLING
+def generate_sibling(frames):
+    rows = []
+    df = frames.get("sibling", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "sibling")
+        for r in owned_rows(df, "entity1"):
+            e1 = resolve_label(r.get("entity1") or r.get("entity1_label"))
+            e2 = resolve_label(r.get("entity2") or r.get("entity2_label"))
+            p = resolve_label(r.get("parent") or r.get("parent_label"))
+
+            if not (e1 and e2 and p):
+                continue
+            seed_row("sibling", e1, e2, p)
+
+            d = sanitize_distractors(distractors_for_sibling(e2, 3), e2)
+            if len(d) >= 2:
+                add_mcq(rows, {"entity1": e1, "parent": p}, e2, d, "Sibling Classes",
+                        r.get("entity1"), r.get("entity2"), "sibling")
+    return render_questions("sibling_classes", rows)
+
+# DATA PROPERTY
+def generate_data(frames):
+    rows = []
+    df = frames.get("data", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "data")
+        pools = df.groupby("property_label")["value_str"].apply(list).to_dict() if "property_label" in df.columns else {}
+
+        for r in owned_rows(df, "subject"):
+            subj = resolve_label(r.get("subject_label") or r.get("subject"))
+            prop_raw = r.get("property_label") or r.get("property")
+            val = clean(r.get("value_str") or r.get("value"))
+            prop_text = pretty_prop(prop_raw)
+
+            if not (subj and prop_text and val):
+                continue
+            seed_row("data", subj, prop_text, val)
+
+            q = {"subject": subj, "property": prop_text}
+            pool_vals = pools.get(r.get("property_label"), [])
+            d = sanitize_distractors(distractors_for_data_value(val, prop_text, pool_vals, 3), val)
+            if len(d) >= 2:
+                add_mcq(rows, q, val, d, "Data Property", r.get("subject"), "", r.get("property"))
+    return render_questions("data_property_facts", rows)
+
+# DIRECTOR QUESTIONS
+def generate_director(frames):
+    rows = []
+    df = frames.get("director", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "director")
+        all_directors = [resolve_label(x) for x in df.get("director", df.get("director_label", []))]
+        prefetch_similar(df.get("director", df.get("director_label", [])))
+
+        for r in owned_rows(df, "movie"):
+            movie = resolve_label(r.get("movie_label") or r.get("movie"))
+            director = resolve_label(r.get("director_label") or r.get("director"))
+
+            if not (movie and director):
+                continue
+            seed_row("director", movie, director)
+
+            q = {"movie": movie}
+            d = sanitize_distractors(distractors_for_role_object(director, "director", all_directors, 3), director)
+            if len(d) >= 2:
+                add_mcq(rows, q, director, d, "Director Question", r.get("movie"), r.get("director"), r.get("property"))
+    return render_questions("director_questions", rows)
+
+# ACTOR QUESTIONS
+def generate_actor(frames):
+    rows = []
+    df = frames.get("actor", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "actor")
+        all_actors = [resolve_label(x) for x in df.get("actor", df.get("actor_label", []))]
+        prefetch_similar(df.get("actor", df.get("actor_label", [])))
+
+        for r in owned_rows(df, "movie"):
+            movie = resolve_label(r.get("movie_label") or r.get("movie"))
+            actor = resolve_label(r.get("actor_label") or r.get("actor"))
+
+            if not (movie and actor):
+                continue
+            seed_row("actor", movie, actor)
+
+            q = {"movie": movie}
+            d = sanitize_distractors(distractors_for_role_object(actor, "actor", all_actors, 3), actor)
+            if len(d) >= 2:
+                add_mcq(rows, q, actor, d, "Actor Question", r.get("movie"), r.get("actor"), r.get("property"))
+    return render_questions("actor_questions", rows)
+
+# RELEASE DATE QUESTIONS
+def generate_release(frames):
+    rows = []
+    df = frames.get("release", EMPTY_FRAME)
+    if not df.empty:
+        df = take_rows(df, "release")
+        all_dates = [clean(x) for x in df.get("date_str", [])]
+
+        for r in owned_rows(df, "movie"):
+            movie = resolve_label(r.get("movie_label") or r.get("movie"))
+            date = clean(r.get("date_str") or r.get("date"))
+
+            if not (movie and date):
+                continue
+            seed_row("release", movie, date)
+
+            q = {"movie": movie}
+            d = sanitize_distractors(distractors_for_data_value(date, "year", all_dates, 3), date)
+            if len(d) >= 2:
+                add_mcq(rows, q, date, d, "Release Date", r.get("movie"), "", r.get("property"))
+    return render_questions("release_questions", rows)
+
+# COMPOSITE QUESTIONS (star-join patterns, see Star_Join.py)
+def generate_composite(frames):
+    all_rows = []
+    for name, pattern in COMPOSITE_PATTERNS.items():
+        rows = []
+        df = frames.get(name, EMPTY_FRAME)
+        if df.empty:
+            continue
+        df = df.head(pattern.get("limit", len(df)))
+        center, answer = pattern["center"], pattern["answer"]
+        literal = is_data_role(pattern["roles"][answer])
+        if literal:
+            pool = [clean(x) for x in df[answer]]
+        else:
+            pool = [resolve_label(x) for x in df.get(f"{answer}_label", df[answer])]
+            prefetch_similar(df[answer])
+
+        for r in owned_rows(df, center):
+            values = {center: resolve_label(r.get(f"{center}_label") or r.get(center))}
+            for role, spec in pattern["roles"].items():
+                values[role] = clean(r.get(role)) if is_data_role(spec) else resolve_label(r.get(f"{role}_label") or r.get(role))
+            if not all(values.values()):
+                continue
+
+            seed_row(name, *values.values())
+            ans = values.pop(answer)
+            if literal:
+                d = distractors_for_data_value(ans, answer, pool, 3)
+            else:
+                d = distractors_for_role_object(ans, answer, pool, 3)
+            d = sanitize_distractors(d, ans)
+            if len(d) >= 2:
+                add_mcq(rows, values, ans, d, pattern["family"], r.get(center),
+                        "" if literal else r.get(answer), r.get(f"{answer}_property"))
+        all_rows += render_questions(name, rows)
+    return all_rows
+
+# Generators in the order PartC runs them (earlier families win dedup ties)
+FAMILY_GENERATORS = {
+    "taxonomy": generate_taxonomy,
+    "role": generate_role,
+    "chain": generate_chain,
+    "sibling": generate_sibling,
+    "data": generate_data,
+    "director": generate_director,
+    "actor": generate_actor,
+    "release": generate_release,
+    "composite": generate_composite,
+}
+
+# Frames each family reads; a family can run as soon as all of them are available
+FAMILY_INPUTS = {key: [key] for key in FAMILY_GENERATORS}
+FAMILY_INPUTS["composite"] = []   # the composite pattern names, set by set_composite_patterns()
+
+# source_template of every family, in generator order
+FAMILY_NAMES = ["Taxonomy", "Role Relation", "Relational Chain", "Sibling Classes",
+                "Data Property", "Director Question", "Actor Question", "Release Date"]
+
+# Questions kept per source_template, first ones in canonical order
+FAMILY_CAPS = {"Relational Chain": MCQ_LIMITS["chain"] // 2}
+
+def order_rows(rows):
+    """
+    Canonical order of MCQ rows: family order, then a stable hash of the row, with
+    FAMILY_CAPS applied. It depends only on the rows themselves, so merging the rows of
+    several shards gives the same list as generating them in one process.
+    """
+    names = FAMILY_NAMES + [p["family"] for p in COMPOSITE_PATTERNS.values()]
+    rank = {name: n for n, name in reversed(list(enumerate(names)))}
+    ordered, counts = [], {}
+    for r in sorted(rows, key=lambda r: (rank.get(r[3], len(rank)), stable_hash(*r))):
+        counts[r[3]] = counts.get(r[3], 0) + 1
+        cap = FAMILY_CAPS.get(r[3])
+        if cap is None or counts[r[3]] <= cap:
+            ordered.append(r)
+    return ordered
+
+def generate_family(fam, frames):
+    """MCQ rows of one family (a FAMILY_GENERATORS key), in canonical order."""
+    return order_rows(FAMILY_GENERATORS[fam](frames))
+
+def generate_all(frames):
+    """Runs every family generator and returns the MCQ rows."""
+    all_rows = []
+    for fam in FAMILY_GENERATORS:
+        all_rows += generate_family(fam, frames)
+    return all_rows
+
+def to_mcq_frame(rows):
+    """Shuffled MCQ DataFrame as saved to generated_mcqs.csv."""
+    df_mcq = pd.DataFrame(rows, columns=MCQ_COLUMNS)
+    return df_mcq.sample(frac=1, random_state=RANDOM_SEED).reset_index(drop=True)
\ No newline at end of file
@@ -0,0 +1,212 @@
+# @title MCQ Dedup Creation
+#%%writefile MCQ_Dedup.py
+'''
+Near-duplicate removal for generated MCQs, in near-linear time.
+Two passes per question, both hash lookups (no pairwise comparison):
+ 1. Canonical fact key (relation, subject IRI, answer IRI or normalized answer):
+    catches the same fact asked by different families or template variants,
+    e.g. (movie, actor) from "Actor Question" and "Director-Actor Chain",
+    and both orders of a sibling pair.
+ 2. MinHash signature of the normalized question + answer text with LSH banding:
+    only questions sharing a band bucket are compared, and a pair is a duplicate
+    when the estimated Jaccard similarity reaches DEDUP_THRESHOLD.
+Optionally checks against a Question_Bank.QuestionBank so that incremental runs
+only keep questions the bank does not already cover for the same ontology.
+'''
+
+import re, hashlib, unicodedata
+import numpy as np
+
+NUM_PERM = 64            # MinHash permutations per signature
+LSH_BANDS = 16           # 16 bands x 4 rows: pairs above ~0.7 Jaccard almost always share a bucket
+DEDUP_THRESHOLD = 0.8    # estimated Jaccard at or above which two questions are duplicates
+SHINGLE_SIZE = 3         # word n-grams
+MINHASH_SEED = 42
+SIGNATURE_BATCH = 4096   # questions hashed per numpy batch
+# Questions from one template share most of their shingles, so some buckets collect
+# thousands of unrelated questions. A bucket stops growing at this size: true duplicates
+# also meet in buckets built from their entity words, and comparisons stay bounded.
+MAX_BUCKET_SIZE = 32
+
+# Relations whose subject/answer order carries no meaning
+SYMMETRIC_RELATIONS = {"sibling"}
+
+# Multiply-shift hash family: h_i(x) = (a_i * x + b_i mod 2^64) >> 32, with odd a_i
+_rng = np.random.default_rng(MINHASH_SEED)
+_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+# Odd multipliers combining word hashes into shingle hashes and signature rows into band ids
+_SHINGLE_MULT = _rng.integers(1, 2**63, size=SHINGLE_SIZE, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_BAND_MULT = _rng.integers(1, 2**63, size=(LSH_BANDS, NUM_PERM // LSH_BANDS), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+_word_hashes = {}   # word -> 64-bit hash; question vocabularies repeat heavily
+
+def normalize_text(text):
+    """Lowercase, accent-free, punctuation-free, single-spaced text."""
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def _word_hash(w):
+    h = _word_hashes.get(w)
+    if h is None:
+        if len(_word_hashes) > 1_000_000:
+            _word_hashes.clear()
+        h = _word_hashes[w] = int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "big")
+    return h
+
+def _value(x):
+    if x is None or (isinstance(x, float) and x != x):
+        return ""
+    return str(x).strip()
+
+def fact_key(row):
+    """Canonical key of the fact an MCQ asks about (a row dict in generated_mcqs.csv layout)."""
+    relation = _value(row.get("relation")) or _value(row.get("source_template"))
+    subject = _value(row.get("subject_id"))
+    answer = _value(row.get("answer_id")) or normalize_text(row.get("correct_answer", ""))
+    if not subject:
+        return None
+    if relation in SYMMETRIC_RELATIONS:
+        subject, answer = sorted((subject, answer))
+    return "\x1f".join((relation, subject, answer))
+
+def question_text(row):
+    """Text a near-duplicate is judged on: the question together with its answer."""
+    return normalize_text(row.get("question", "")) + " | " + normalize_text(row.get("correct_answer", ""))
+
+def signatures(texts):
+    """
+    MinHash signatures (len(texts) x NUM_PERM, uint32) over word SHINGLE_SIZE-grams,
+    computed in numpy batches. A text shorter than one n-gram is a single shingle.
+    """
+    pad = [0] * (SHINGLE_SIZE - 1)
+    out = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), SIGNATURE_BATCH):
+        batch = texts[start:start + SIGNATURE_BATCH]
+        words, starts, offsets = [], [], []
+        for t in batch:
+            hashes = [_word_hash(w) for w in t.split()]
+            offsets.append(len(starts))
+            starts.extend(range(len(words), len(words) + max(1, len(hashes) - SHINGLE_SIZE + 1)))
+            words.extend(hashes)
+            words.extend(pad)
+        w = np.array(words, dtype=np.uint64)
+        pos = np.array(starts, dtype=np.int64)
+        x = np.zeros(len(pos), dtype=np.uint64)
+        for k in range(SHINGLE_SIZE):
+            x += w[pos + k] * _SHINGLE_MULT[k]
+        h = (_A[:, None] * x[None, :] + _B[:, None]) >> np.uint64(32)
+        out[start:start + len(batch)] = np.minimum.reduceat(h, offsets, axis=1).T
+    return out
+
+def lsh_buckets(sigs):
+    """
+    LSH bucket ids (len(sigs) x LSH_BANDS, int64): each band of NUM_PERM // LSH_BANDS
+    signature rows is mixed into one id, with the band index folded in so ids from
+    different bands never meet.
+    """
+    bands = sigs.astype(np.uint64).reshape(len(sigs), LSH_BANDS, NUM_PERM // LSH_BANDS)
+    x = (bands * _BAND_MULT[None]).sum(axis=2) + np.arange(LSH_BANDS, dtype=np.uint64)
+    x ^= x >> np.uint64(31)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(29)
+    return x.view(np.int64)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+def fingerprints(records):
+    """(fact_key, signature, buckets) for each record, as stored in the question bank."""
+    sigs = signatures([question_text(r) for r in records])
+    buckets = lsh_buckets(sigs).tolist()
+    return [(fact_key(r), sig, b) for r, sig, b in zip(records, sigs, buckets)]
+
+class Deduplicator:
+    """
+    Streaming duplicate filter. Questions are checked in arrival order and the first
+    one of every duplicate group is kept, so the result is deterministic.
+    """
+    def __init__(self, bank=None, threshold=DEDUP_THRESHOLD, ontology=None):
+        self.bank = bank
+        self.ontology = ontology     # bank questions of other ontologies are not duplicates
+        self.threshold = threshold
+        self.facts = set()
+        self.buckets = {}        # bucket id -> indices into self.sigs (at most MAX_BUCKET_SIZE)
+        self.sigs = np.empty((1024, NUM_PERM), dtype=np.uint32)
+        self.n = 0
+        self.removed = {}        # family -> {"fact": n, "text": n, "bank": n}
+        self.kept = {}           # family -> n
+
+    def _count(self, family, reason):
+        counts = self.removed.setdefault(family, {"fact": 0, "text": 0, "bank": 0})
+        counts[reason] += 1
+
+    def _bank_duplicate(self, r, key, sig, buckets):
+        """True when the bank holds a different question covering the same fact or text."""
+        for other in self.bank.find_similar(key, buckets, self.ontology):
+            if other["question"] == r["question"] and other["correct_answer"] == r["correct_answer"]:
+                continue   # the same row: re-ingesting it only refreshes it
+            if other["fact_key"] == key or similarity(sig, other["signature"]) >= self.threshold:
+                return True
+        return False
+
+    def filter(self, records):
+        """Returns the records that are not duplicates of earlier ones (or of the bank)."""
+        keep = []
+        for r, (key, sig, buckets) in zip(records, fingerprints(records)):
+            family = _value(r.get("source_template"))
+            if key is not None and key in self.facts:
+                self._count(family, "fact")
+                continue
+            candidates = set()
+            for b in buckets:
+                ids = self.buckets.get(b)
+                if ids:
+                    candidates.update(ids)
+            if candidates:
+                matches = np.count_nonzero(self.sigs[list(candidates)] == sig, axis=1)
+                if matches.max() >= self.threshold * NUM_PERM:
+                    self._count(family, "text")
+                    continue
+            if self.bank is not None and self._bank_duplicate(r, key, sig, buckets):
+                self._count(family, "bank")
+                continue
+
+            if key is not None:
+                self.facts.add(key)
+            for b in buckets:
+                ids = self.buckets.setdefault(b, [])
+                if len(ids) < MAX_BUCKET_SIZE:
+                    ids.append(self.n)
+            if self.n == len(self.sigs):
+                self.sigs = np.concatenate([self.sigs, np.empty_like(self.sigs)])
+            self.sigs[self.n] = sig
+            self.n += 1
+            self.kept[family] = self.kept.get(family, 0) + 1
+            keep.append(r)
+        return keep
+
+    def filter_rows(self, rows, columns):
+        """filter() for MCQ rows given as lists in `columns` order (MCQ_Core.add_mcq rows)."""
+        kept = self.filter([dict(zip(columns, r)) for r in rows])
+        return [[r[c] for c in columns] for r in kept]
+
+    def report(self):
+        """Per-family counts of kept and removed questions."""
+        lines = [f"{'Family':<24}{'kept':>8}{'fact':>8}{'text':>8}{'bank':>8}"]
+        for fam in sorted(set(self.kept) | set(self.removed)):
+            c = self.removed.get(fam, {"fact": 0, "text": 0, "bank": 0})
+            lines.append(f"{fam:<24}{self.kept.get(fam, 0):>8}{c['fact']:>8}{c['text']:>8}{c['bank']:>8}")
+        return "\n".join(lines)
+
+    def total_removed(self):
+        return sum(sum(c.values()) for c in self.removed.values())
+
+def dedup_rows(rows, columns, bank=None, threshold=DEDUP_THRESHOLD, ontology=None):
+    """Dedups MCQ rows (lists in `columns` order, against the bank's `ontology`); returns (kept rows, Deduplicator)."""
+    dd = Deduplicator(bank, threshold, ontology)
+    return dd.filter_rows(rows, columns), dd
\ No newline at end of file
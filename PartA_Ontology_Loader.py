@@ -3,13 +3,24 @@
 Load the ontology and prepare for graph parsing and MCQ generation
 '''
 
-from Utility_Files import load_ontology, get_label, summarize_ontology
-ONTOLOGY_PATH = "/content/drive/MyDrive/OWL Files/cinema.owl"
+import os
+from Utility_Files import load_ontology, get_label, summarize_ontology, release_ontology, memory_budget_mb
+# Batch runs inject their own ONTOLOGY_PATH into the session before this cell;
+# outside Colab the ONTOLOGY_PATH environment variable replaces the Drive default
+ONTOLOGY_PATH = globals().get("ONTOLOGY_PATH",
+                              os.environ.get("ONTOLOGY_PATH", "/content/drive/MyDrive/OWL Files/cinema.owl"))
 
 USE_REASONER = False  # Toggle ON if reasoning is required
 
 onto, owl_file = load_ontology(ONTOLOGY_PATH, USE_REASONER)  #Load Ontology
 summarize_ontology(onto)   # Summarize Ontology
 
+# Bounded-memory mode (MEMORY_BUDGET_MB): Part B parses the file again with rdflib,
+# so the owlready2 world is released before the graph is built. This only lowers the
+# peak; files too large for the budget are streamed by the batch runner instead
+if memory_budget_mb(globals()):
+    release_ontology(onto)
+    onto = None
+
 # Confirming readiness for next modules
 print(f"Ontology file ready for RDF graph parsing: {owl_file}")
\ No newline at end of file
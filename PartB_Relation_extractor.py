@@ -1,9 +1,10 @@
 # @title PartB_Templates.py
 
 from rdflib import RDF, RDFS, OWL, Literal
-from Utility_Files import get_label
+from Utility_Files import get_label, ReservoirSampler, shard_of
+from Star_Join import load_patterns, evaluate_pattern, pattern_frame, pattern_columns, composite_file
 import pandas as pd
-import random
+import random, os, json
 
 required_vars = ['g', 'GEN', 'found_label']
 for v in required_vars:
@@ -21,6 +22,32 @@ LIMITS = {
     "released": 150
 }
 
+# Rows are a seeded reservoir sample over the whole graph instead of the first LIMITS rows.
+# STRATIFY spreads a template's sample evenly over its properties ("property") or over the
+# class of its subject ("class"; the parent class for taxonomy/sibling). None = plain sample.
+SAMPLING_SEED = 42
+STRATIFY = {
+    "taxonomy": None,
+    "role": "property",
+    "chain": "property",
+    "sibling": "class",
+    "data": "property",
+    "directed": None,
+    "acted": None,
+    "released": None
+}
+
+# Sharded runs (PartD_Sharded_runner.py) pass SHARD = (index, count): only subjects of that
+# shard are extracted (for chains x -> y -> z, the middle entity y, whose incoming and
+# outgoing edges are both in the shard's partition), and every CSV keeps all per-stratum
+# reservoir entries plus a "stratum" column, so that the shards' samples merge into the
+# single-run sample.
+SHARD = globals().get("SHARD")
+sample_strata, sample_manifest = {}, {}
+
+def in_shard(subject):
+    return SHARD is None or shard_of(subject, SHARD[1]) == SHARD[0]
+
 def safe_get_label(uri):
     """Wrapper around get_label() that handles rdflib entities safely."""
     try:
@@ -29,158 +56,191 @@ def safe_get_label(uri):
         s = str(uri)
         return s.split("#")[-1] if "#" in s else s.split("/")[-1]
 
+def subject_class(s):
+    """First non-OWL rdf:type of s (sorted for a stable pick), or None."""
+    types = sorted(str(t) for t in g.objects(s, RDF.type) if not str(t).startswith(str(OWL)))
+    return types[0] if types else None
+
+def stratum(key, prop, subject, parent=None):
+    """Sampling stratum of one row according to STRATIFY[key]."""
+    mode = STRATIFY.get(key)
+    if mode == "property":
+        return prop
+    if mode == "class":
+        return parent if parent is not None else subject_class(subject)
+    return None
+
+def sample_rows(key, rows):
+    """Seeded reservoir sample of (stratum, row) pairs for one template."""
+    sampler = ReservoirSampler(LIMITS[key], SAMPLING_SEED, key)
+    for st, row in rows:
+        sampler.add(row, st)
+    if SHARD is None:
+        sample = sampler.rows()
+    else:
+        entries = sampler.entries()
+        sample_strata[key] = [st for st, _ in entries]
+        sample = [row for _, row in entries]
+    print(f"  sampled {len(sample)} of {sampler.seen} rows")
+    return sample
+
+def save_sample(df, path, name, limit, columns):
+    """Writes one template CSV; in sharded runs with its strata and how to merge it (sampler name, limit, raw columns)."""
+    if SHARD is not None:
+        df = df.assign(stratum=sample_strata.get(name, [None] * len(df)))
+        sample_manifest[path] = {"name": name, "seed": SAMPLING_SEED, "limit": limit, "columns": columns}
+    df.to_csv(path, index=False)
+
 # TEMPLATE 1 – TAXONOMY RELATIONS
 print("Extracting: Taxonomy relations (subClassOf)...")
-q_taxonomy = """SELECT ?child ?parent WHERE { ?child rdfs:subClassOf ?parent . }"""
-res_taxonomy = list(g.query(q_taxonomy))[:LIMITS["taxonomy"]]
+res_taxonomy = sample_rows("taxonomy", (
+    (stratum("taxonomy", RDFS.subClassOf, child, parent), (child, parent))
+    for child, parent in g.subject_objects(RDFS.subClassOf) if in_shard(child)
+))
 df_taxonomy = pd.DataFrame(res_taxonomy, columns=["child", "parent"])
 df_taxonomy["child_label"] = df_taxonomy["child"].apply(safe_get_label)
 df_taxonomy["parent_label"] = df_taxonomy["parent"].apply(safe_get_label)
-df_taxonomy.to_csv("taxonomy_relations.csv", index=False)
+save_sample(df_taxonomy, "taxonomy_relations.csv", "taxonomy", LIMITS["taxonomy"], ["child", "parent"])
 print("Saved taxonomy_relations.csv")
 
 # TEMPLATE 2 – ROLE RELATIONS (Object Properties)
 print("Extracting: Role relations (object properties)...")
-obj_props = list(g.subjects(RDF.type, OWL.ObjectProperty))
-rows = []
-for p in obj_props:
-    if len(rows) >= LIMITS["role"]:
-        break
-    for s, _, o in g.triples((None, p, None)):
-        rows.append([p, s, o])
-        if len(rows) >= LIMITS["role"]:
-            break
+obj_props = sorted(g.subjects(RDF.type, OWL.ObjectProperty), key=str)
+rows = sample_rows("role", (
+    (stratum("role", p, s), (p, s, o))
+    for p in obj_props for s, _, o in g.triples((None, p, None)) if in_shard(s)
+))
 df_roles = pd.DataFrame(rows, columns=["property", "subject", "object"])
 df_roles["property_label"] = df_roles["property"].apply(safe_get_label)
 df_roles["subject_label"] = df_roles["subject"].apply(safe_get_label)
 df_roles["object_label"] = df_roles["object"].apply(safe_get_label)
-df_roles.to_csv("role_relations.csv", index=False)
+save_sample(df_roles, "role_relations.csv", "role", LIMITS["role"], ["property", "subject", "object"])
 print("Saved role_relations.csv")
 
 # TEMPLATE 3 – RELATIONAL CHAINS
 print("Extracting: Relational chains...")
-obj_props_sample = random.sample(obj_props, min(20, len(obj_props)))
-chain_rows = []
-for p1 in obj_props_sample:
-    for p2 in obj_props_sample:
-        if len(chain_rows) >= LIMITS["chain"]:
-            break
-        q = f"""
-        SELECT ?x ?y ?z
-        WHERE {{
-            ?x <{p1}> ?y .
-            ?y <{p2}> ?z .
-        }}
-        LIMIT 10
-        """
-        for x, y, z in g.query(q):
-            chain_rows.append([p1, p2, x, y, z])
-        if len(chain_rows) >= LIMITS["chain"]:
-            break
+obj_props_sample = random.Random(SAMPLING_SEED).sample(obj_props, min(20, len(obj_props)))
+
+def iter_chains():
+    for p1 in obj_props_sample:
+        for p2 in obj_props_sample:
+            for x, y in g.subject_objects(p1):
+                if not in_shard(y):
+                    continue
+                for z in g.objects(y, p2):
+                    yield stratum("chain", (p1, p2), x), (p1, p2, x, y, z)
+
+chain_rows = sample_rows("chain", iter_chains())
 df_chain = pd.DataFrame(chain_rows, columns=["prop1", "prop2", "x", "y", "z"])
 for col in ["prop1", "prop2", "x", "y", "z"]:
     df_chain[f"{col}_label"] = df_chain[col].apply(safe_get_label)
-df_chain.to_csv("relational_chains.csv", index=False)
+save_sample(df_chain, "relational_chains.csv", "chain", LIMITS["chain"], ["prop1", "prop2", "x", "y", "z"])
 print("Saved relational_chains.csv")
 
 # TEMPLATE 4 – SIBLING CLASSES
 print("Extracting: Sibling classes...")
-q_siblings = """
-SELECT ?e1 ?e2 ?parent
-WHERE {
-  ?e1 rdfs:subClassOf ?parent .
-  ?e2 rdfs:subClassOf ?parent .
-  FILTER(?e1 != ?e2)
-}
-"""
-res_sib = list(g.query(q_siblings))[:LIMITS["sibling"]]
+def iter_siblings():
+    for parent in set(g.objects(None, RDFS.subClassOf)):
+        children = list(g.subjects(RDFS.subClassOf, parent))
+        st = stratum("sibling", RDFS.subClassOf, None, parent)
+        for e1 in filter(in_shard, children):
+            for e2 in children:
+                if e1 != e2:
+                    yield st, (e1, e2, parent)
+
+res_sib = sample_rows("sibling", iter_siblings())
 df_sib = pd.DataFrame(res_sib, columns=["entity1", "entity2", "parent"])
 for col in ["entity1", "entity2", "parent"]:
     df_sib[f"{col}_label"] = df_sib[col].apply(safe_get_label)
-df_sib.to_csv("sibling_classes.csv", index=False)
+save_sample(df_sib, "sibling_classes.csv", "sibling", LIMITS["sibling"], ["entity1", "entity2", "parent"])
 print("Saved sibling_classes.csv")
 
 # TEMPLATE 5 – DATA PROPERTY FACTS
 print("Extracting: Data property facts...")
-data_props = list(g.subjects(RDF.type, OWL.DatatypeProperty))
-data_rows = []
-for p in data_props:
-    if len(data_rows) >= LIMITS["data"]:
-        break
-    for s, _, o in g.triples((None, p, None)):
-        if isinstance(o, Literal):
-            data_rows.append([p, s, o])
-        if len(data_rows) >= LIMITS["data"]:
-            break
+data_props = sorted(g.subjects(RDF.type, OWL.DatatypeProperty), key=str)
+data_rows = sample_rows("data", (
+    (stratum("data", p, s), (p, s, o))
+    for p in data_props for s, _, o in g.triples((None, p, None)) if isinstance(o, Literal) and in_shard(s)
+))
 df_data = pd.DataFrame(data_rows, columns=["property", "subject", "value"])
 df_data["property_label"] = df_data["property"].apply(safe_get_label)
 df_data["subject_label"] = df_data["subject"].apply(safe_get_label)
 df_data["value_str"] = df_data["value"].astype(str)
-df_data.to_csv("data_property_facts.csv", index=False)
+save_sample(df_data, "data_property_facts.csv", "data", LIMITS["data"], ["property", "subject", "value"])
 print("Saved data_property_facts.csv")
 
 # TEMPLATE 6 – DIRECTOR QUESTIONS
 director_props = [p for p in obj_props if 'director' in str(p).lower()]
-director_rows = []
-for p in director_props:
-    for movie, _, director in g.triples((None, p, None)):
-        director_rows.append([p, movie, director])
-        if len(director_rows) >= LIMITS["directed"]:
-            break
-    if len(director_rows) >= LIMITS["directed"]:
-        break
+director_rows = sample_rows("directed", (
+    (stratum("directed", p, movie), (p, movie, director))
+    for p in director_props for movie, _, director in g.triples((None, p, None)) if in_shard(movie)
+))
 
 if director_rows:
     df_director = pd.DataFrame(director_rows, columns=["property", "movie", "director"])
     df_director["property_label"] = df_director["property"].apply(safe_get_label)
     df_director["movie_label"] = df_director["movie"].apply(safe_get_label)
     df_director["director_label"] = df_director["director"].apply(safe_get_label)
-    df_director.to_csv("director_relations.csv", index=False)
+    save_sample(df_director, "director_relations.csv", "directed", LIMITS["directed"], ["property", "movie", "director"])
     # print("Saved director_relations.csv")
 # else:
     # print("No director relations found")
 
 # TEMPLATE 7 – ACTOR QUESTIONS
 actor_props = [p for p in obj_props if 'actor' in str(p).lower() or 'starring' in str(p).lower()]
-actor_rows = []
-for p in actor_props:
-    for movie, _, actor in g.triples((None, p, None)):
-        actor_rows.append([p, movie, actor])
-        if len(actor_rows) >= LIMITS["acted"]:
-            break
-    if len(actor_rows) >= LIMITS["acted"]:
-        break
+actor_rows = sample_rows("acted", (
+    (stratum("acted", p, movie), (p, movie, actor))
+    for p in actor_props for movie, _, actor in g.triples((None, p, None)) if in_shard(movie)
+))
 
 if actor_rows:
     df_actor = pd.DataFrame(actor_rows, columns=["property", "movie", "actor"])
     df_actor["property_label"] = df_actor["property"].apply(safe_get_label)
     df_actor["movie_label"] = df_actor["movie"].apply(safe_get_label)
     df_actor["actor_label"] = df_actor["actor"].apply(safe_get_label)
-    df_actor.to_csv("actor_relations.csv", index=False)
+    save_sample(df_actor, "actor_relations.csv", "acted", LIMITS["acted"], ["property", "movie", "actor"])
 #     print("Saved actor_relations.csv")
 # else:
 #     print("No actor relations found")
 
 # TEMPLATE 8 – DATE QUESTIONS
 date_props = [p for p in data_props if any(kw in str(p).lower() for kw in ['date', 'year', 'release'])]
-release_rows = []
-for p in date_props:
-    for movie, _, date_val in g.triples((None, p, None)):
-        if isinstance(date_val, Literal):
-            release_rows.append([p, movie, date_val])
-        if len(release_rows) >= LIMITS["released"]:
-            break
-    if len(release_rows) >= LIMITS["released"]:
-        break
+release_rows = sample_rows("released", (
+    (stratum("released", p, movie), (p, movie, date_val))
+    for p in date_props for movie, _, date_val in g.triples((None, p, None))
+    if isinstance(date_val, Literal) and in_shard(movie)
+))
 
 if release_rows:
     df_release = pd.DataFrame(release_rows, columns=["property", "movie", "date"])
     df_release["property_label"] = df_release["property"].apply(safe_get_label)
     df_release["movie_label"] = df_release["movie"].apply(safe_get_label)
     df_release["date_str"] = df_release["date"].astype(str)
-    df_release.to_csv("release_date_relations.csv", index=False)
+    save_sample(df_release, "release_date_relations.csv", "released", LIMITS["released"], ["property", "movie", "date"])
 #     print("Saved release_date_relations.csv")
 # else:
 #     print("No release date relations found")
 
+# COMPOSITE PATTERNS – star joins over the full graph (composite_patterns.json)
+# Batch runs load the patterns once and pass them in as COMPOSITE_PATTERNS
+if "COMPOSITE_PATTERNS" not in globals():
+    COMPOSITE_PATTERNS = load_patterns("composite_patterns.json") if os.path.exists("composite_patterns.json") else {}
+
+def graph_pairs(p, is_data):
+    """(subject, value) pairs of one property; data roles keep literal values only."""
+    for s, o in g.subject_objects(p):
+        if isinstance(o, Literal) == is_data and in_shard(s):
+            yield s, o
+
+for name, pattern in COMPOSITE_PATTERNS.items():
+    print(f"Extracting: Composite pattern {name}...")
+    rows, joined = evaluate_pattern(name, pattern, graph_pairs, obj_props, data_props, SAMPLING_SEED)
+    print(f"  sampled {len(rows)} of {joined} joined rows")
+    save_sample(pattern_frame(pattern, rows, safe_get_label), composite_file(name), name,
+                pattern.get("limit", 100), pattern_columns(pattern))
+
+if SHARD is not None:
+    with open("samples.json", "w", encoding="utf-8") as f:
+        json.dump(sample_manifest, f, indent=2)
+
 print("\nAll template CSVs generated successfully.")
\ No newline at end of file
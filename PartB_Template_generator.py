@@ -1,5 +1,7 @@
 # @title json file creation
-import json
+import os, json
+from MCQ_Core import template_fields
+from Template_Registry import TemplateRegistry
 
 question_templates = {
     "taxonomy_relations": [
@@ -17,7 +19,7 @@ question_templates = {
     ],
 
     "relational_chains": [
-        "Given that {x} is related to {y}, and {y} is related to {z}, what is the final entity connected to {x}?",
+        "Given that {x} is related to {y}, what is the final entity {y} leads to?",
         "If {x} connects through {y}, which entity is ultimately linked?",
         "Through the connection {x} → {y} → ?, which final entity emerges?"
     ],
@@ -59,11 +61,60 @@ question_templates = {
         "In {movie} directed by {director}, who was one of the main actors?",
         "Which actor appeared in {director}'s film {movie}?",
         "Name an actor from {movie}, a film by {director}."
+    ],
+
+    "actor_release_chain": [
+        "When was {movie}, starring {actor}, released?",
+        "In which year did {actor}'s film {movie} come out?",
+        "What is the release year of {movie}, featuring {actor}?"
     ]
 }
 
-with open("question_templates.json", "w", encoding="utf-8") as f:
-    json.dump(question_templates, f, indent=2, ensure_ascii=False)
+# Composite (multi-relation) patterns, joined on the full graph by Star_Join.py.
+# Each key is also the question_templates key used to phrase the question.
+composite_patterns = {
+    "director_actor_chain": {
+        "family": "Director-Actor Chain",
+        "center": "movie",
+        "roles": {
+            "director": {"properties": ["director"]},
+            "actor": {"properties": ["actor", "starring"]}
+        },
+        "answer": "actor",
+        "limit": 60
+    },
+
+    "actor_release_chain": {
+        "family": "Actor-Release Chain",
+        "center": "movie",
+        "roles": {
+            "actor": {"properties": ["actor", "starring"]},
+            "release": {"properties": ["date", "year", "release"], "kind": "data"}
+        },
+        "answer": "release",
+        "limit": 60
+    }
+}
+
+# Every template is compiled and checked against the slots its family provides
+TemplateRegistry(question_templates, template_fields(composite_patterns))
+
+def write_if_changed(path, data):
+    """
+    Writes the JSON file only when its content differs, so re-running this cell leaves an
+    unchanged file (and its mtime) alone. Compiled templates are cached per process by
+    content (Template_Registry.compile_registry), not by file.
+    """
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
 
-print("question_templates.json created successfully")
-print(f"Total: {sum(len(v) for v in question_templates.values())} question templates are available")
\ No newline at end of file
+for path, data in [("question_templates.json", question_templates), ("composite_patterns.json", composite_patterns)]:
+    print(f"{path} {'written' if write_if_changed(path, data) else 'unchanged'}")
+print(f"Total: {sum(len(v) for v in question_templates.values())} question templates are available")
+print(f"{len(composite_patterns)} composite patterns")
\ No newline at end of file
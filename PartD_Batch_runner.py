@@ -0,0 +1,265 @@
+# @title PartD - Batch Runner
+'''
+Runs Parts A–C for every ontology in a directory (or listed in a manifest file)
+on a bounded process pool. Each ontology gets its own globals session, its own
+worker process and its own output folder, so one failing file never stops the batch.
+
+With --memory-budget, every stage runs in bounded-memory mode (see
+Utility_Files.memory_budget_mb) and ontologies are only started while the estimated
+peaks of the running ones fit in the budget. An ontology whose estimated peak alone
+exceeds the budget runs in streaming mode instead (PartD_Pipelined_runner.py: triples
+are streamed from a parser process and no rdflib graph is built), which needs about a
+third of the memory for the same output. The peak RSS of every stage is reported.
+
+Usage:
+    python PartD_Batch_runner.py "OWL Files/" --out Output/batch --workers 4
+    python PartD_Batch_runner.py ontologies.txt   # manifest: one OWL path per line
+    python PartD_Batch_runner.py "OWL Files/" --memory-budget 2048
+'''
+
+import os, sys, csv, json, time, argparse, traceback, contextlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from Utility_Files import (run_stage, ensure_dir, estimate_peak_mb, children_peak_mb, memory_budget_mb,
+                           MemoryReport)
+from MCQ_Core import load_composite_patterns, template_fields
+from Template_Registry import TemplateRegistry
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ONTOLOGY_EXTENSIONS = (".owl", ".rdf", ".xml")
+
+# PartB_Template_generator is not listed: templates are loaded once for the whole batch
+STAGES = [
+    "PartA_Ontology_Loader.py",
+    "PartB_Rdf_graph_builder.py",
+    "PartB_Relation_extractor.py",
+    "PartC_MCQ_generator.py",
+]
+STREAMING_STAGE = "PartD_Pipelined_runner.py"
+
+def run_mode(owl_path, budget_mb=None):
+    """'streaming' when the stages' estimated peak alone exceeds the budget, else 'stages'."""
+    return "streaming" if budget_mb and estimate_peak_mb(owl_path) > budget_mb else "stages"
+
+def admission_mb(owl_path, budget_mb=None):
+    """Estimated peak MB an ontology takes from the budget in the mode it will run in."""
+    return estimate_peak_mb(owl_path, streaming=run_mode(owl_path, budget_mb) == "streaming")
+
+def find_ontologies(source):
+    """
+    Returns the OWL files to process.
+    A directory is scanned for ontology files; any other file is read as a manifest
+    with one path per line (blank lines and '#' comments are skipped).
+    """
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(ONTOLOGY_EXTENSIONS))
+        return [os.path.abspath(os.path.join(source, n)) for n in names]
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(os.path.abspath(os.path.join(base, line)))
+    return paths
+
+def output_dirs(paths, out_root):
+    """One output folder per ontology, named after the file (suffixed on name clashes)."""
+    dirs, used = [], {}
+    for p in paths:
+        stem = os.path.splitext(os.path.basename(p))[0]
+        used[stem] = used.get(stem, 0) + 1
+        name = stem if used[stem] == 1 else f"{stem}_{used[stem]}"
+        dirs.append(os.path.join(os.path.abspath(out_root), name))
+    return dirs
+
+def load_templates(path, out_root):
+    """
+    Loads question_templates.json and the composite_patterns.json next to it once,
+    creating both with PartB_Template_generator if the templates are missing.
+    """
+    if not os.path.exists(path):
+        ensure_dir(out_root)
+        prev_cwd = os.getcwd()
+        try:
+            os.chdir(out_root)
+            run_stage(os.path.join(REPO_DIR, "PartB_Template_generator.py"), {"__name__": "__main__"})
+        finally:
+            os.chdir(prev_cwd)
+        path = os.path.join(out_root, "question_templates.json")
+    with open(path, "r", encoding="utf-8") as f:
+        templates = json.load(f)
+    patterns = load_composite_patterns(os.path.join(os.path.dirname(path), "composite_patterns.json"))
+    # A bad template fails here, before any worker starts
+    TemplateRegistry(templates, template_fields(patterns))
+    return templates, patterns
+
+def process_ontology(owl_path, out_dir, templates, patterns, bank_path=None, budget_mb=None):
+    """
+    Worker: runs every stage for one ontology in a fresh session inside out_dir, or the
+    pipelined runner when the ontology is too large for the budget (run_mode).
+    Never raises; returns a report dict with status, timings, peak RSS per stage and the error if any.
+    """
+    mode = run_mode(owl_path, budget_mb)
+    report = {"ontology": owl_path, "output_dir": out_dir, "status": "ok", "mode": mode,
+              "seconds": 0.0, "mcqs": 0, "stage_seconds": {}, "stage_peak_mb": {}, "error": ""}
+    memory = MemoryReport(budget_mb)
+    start = time.time()
+    prev_cwd = os.getcwd()
+    session = {
+        "__name__": "__main__",
+        "ONTOLOGY_PATH": owl_path,
+        "QUESTION_PATTERNS": templates,
+        "COMPOSITE_PATTERNS": patterns,
+        # PartC drops questions the bank already covers (read-only here), under the
+        # ontology name the parent upserts this folder's MCQs with
+        "QUESTION_BANK_PATH": bank_path,
+        "QUESTION_BANK_ONTOLOGY": os.path.basename(out_dir),
+        "MEMORY_BUDGET_MB": budget_mb,
+    }
+    try:
+        ensure_dir(out_dir)
+        os.chdir(out_dir)
+        # Stage output goes to a per-ontology log instead of the shared console
+        with open("pipeline.log", "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+            if mode == "streaming":
+                from PartD_Pipelined_runner import run_pipelined
+                print(f"Estimated peak {estimate_peak_mb(owl_path):.0f} MB is over the {budget_mb:g} MB budget: "
+                      f"streaming run")
+                t0 = time.time()
+                with memory.stage(STREAMING_STAGE):
+                    session["df_mcq"] = run_pipelined(owl_path, ".", templates=templates, patterns=patterns,
+                                                      bank_path=bank_path, ontology=os.path.basename(out_dir))
+                # The parser process runs next to this one: count both
+                memory.peaks[STREAMING_STAGE] = round(memory.peaks[STREAMING_STAGE] + children_peak_mb(), 1)
+                report["stage_seconds"][STREAMING_STAGE] = round(time.time() - t0, 2)
+            else:
+                for stage in STAGES:
+                    t0 = time.time()
+                    with memory.stage(stage):
+                        run_stage(os.path.join(REPO_DIR, stage), session)
+                    report["stage_seconds"][stage] = round(time.time() - t0, 2)
+            print("\n".join(["Peak RSS per stage:"] + memory.lines()))
+        report["mcqs"] = len(session.get("df_mcq", []))
+    except Exception:
+        report["status"] = "failed"
+        report["error"] = traceback.format_exc()
+    finally:
+        os.chdir(prev_cwd)
+        report["seconds"] = round(time.time() - start, 2)
+        report["stage_peak_mb"] = memory.peaks
+    return report
+
+def write_report(reports, path):
+    """Saves one row per ontology with timings and failures."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ontology", "status", "mode", "seconds", "mcqs", "stage_seconds", "stage_peak_mb",
+                         "output_dir", "error"])
+        for r in reports:
+            writer.writerow([r["ontology"], r["status"], r.get("mode", ""), r["seconds"], r["mcqs"],
+                             json.dumps(r["stage_seconds"]), json.dumps(r["stage_peak_mb"]), r["output_dir"],
+                             r["error"].strip()])
+
+def run_batch(source, out_root="Output/batch", workers=None, templates_path="question_templates.json",
+              bank_path=None, budget_mb=None):
+    """
+    Processes every ontology from source and returns the list of per-file reports.
+    With bank_path, PartC skips questions the bank already covers and each finished
+    ontology's MCQs are upserted into it. With budget_mb, stages run in bounded-memory
+    mode, an ontology too large for the budget runs in streaming mode, and an ontology
+    starts only when its estimated peak RSS fits next to the running ones (a single
+    ontology always runs, even over the budget).
+    """
+    paths = find_ontologies(source)
+    if not paths:
+        print(f"No ontology files found in {source}")
+        return []
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    templates, patterns = load_templates(templates_path, out_root)
+    dirs = output_dirs(paths, out_root)
+    print(f"Processing {len(paths)} ontologies on {workers} worker processes...")
+
+    bank = None
+    if bank_path:
+        from Question_Bank import QuestionBank, read_mcq_csv
+        # Workers open the bank from inside each output folder
+        bank_path = os.path.abspath(bank_path)
+        bank = QuestionBank(bank_path)
+
+    reports = []
+    batch_start = time.time()
+    pending = list(zip(paths, dirs))
+    running = {}   # future -> (path, out_dir, estimated peak MB)
+    # One task per child process keeps the rdflib graph and owlready2 world of one
+    # ontology from leaking into the next one handled by the same worker
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        while pending or running:
+            # Backpressure: without a budget every ontology is queued at once
+            while pending and (not running or budget_mb is None or
+                               sum(e for _, _, e in running.values()) + admission_mb(pending[0][0], budget_mb)
+                               <= budget_mb):
+                p, d = pending.pop(0)
+                fut = pool.submit(process_ontology, p, d, templates, patterns, bank_path, budget_mb)
+                running[fut] = (p, d, admission_mb(p, budget_mb) if budget_mb else 0)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                p, d, _ = running.pop(fut)
+                try:
+                    r = fut.result()
+                except Exception:
+                    # The worker process itself died (e.g. killed for memory)
+                    r = {"ontology": p, "output_dir": d, "status": "crashed", "mode": run_mode(p, budget_mb),
+                         "seconds": 0.0, "mcqs": 0,
+                         "stage_seconds": {}, "stage_peak_mb": {}, "error": traceback.format_exc()}
+                if r["status"] == "ok" and bank is not None:
+                    # Only the parent process writes to the bank (SQLite has a single writer);
+                    # a CSV or bank error fails this ontology, not the batch
+                    try:
+                        bank.upsert_mcqs(read_mcq_csv(os.path.join(d, "generated_mcqs.csv")), os.path.basename(d))
+                    except Exception:
+                        r["status"] = "failed"
+                        r["error"] = traceback.format_exc()
+                reports.append(r)
+                line = f"[{r['status']:>7}] {os.path.basename(p)}: {r['seconds']:.1f}s"
+                if r["status"] == "ok":
+                    peak = max(r["stage_peak_mb"].values())
+                    line += f", {r['mcqs']} MCQs, peak {peak:.0f} MB"
+                    if r["mode"] == "streaming":
+                        line += " (streaming)"
+                    if budget_mb and peak > budget_mb:
+                        line += f" (over the {budget_mb:g} MB budget)"
+                else:
+                    line += f" -> {r['error'].strip().splitlines()[-1] if r['error'].strip() else 'unknown error'}"
+                print(line)
+
+    if bank is not None:
+        bank.close()
+    reports.sort(key=lambda r: paths.index(r["ontology"]))
+    ensure_dir(out_root)
+    report_path = os.path.join(out_root, "batch_report.csv")
+    write_report(reports, report_path)
+
+    failed = sum(r["status"] != "ok" for r in reports)
+    print(f"\nBatch finished in {time.time() - batch_start:.1f}s: "
+          f"{len(reports) - failed} succeeded, {failed} failed. Report: {report_path}")
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate MCQs for a directory or manifest of ontologies.")
+    parser.add_argument("source", help="directory of OWL files, or a manifest file listing one path per line")
+    parser.add_argument("--out", default="Output/batch", help="root folder for per-ontology outputs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--templates", default="question_templates.json",
+                        help="shared question templates (generated if missing)")
+    parser.add_argument("--bank", default=None, help="SQLite question bank to upsert results into")
+    parser.add_argument("--memory-budget", type=float, default=memory_budget_mb(), metavar="MB",
+                        help="memory budget for the whole batch (default: $MCQ_MEMORY_BUDGET_MB, unbounded)")
+    args = parser.parse_args(argv)
+
+    reports = run_batch(args.source, args.out, args.workers, args.templates, args.bank, args.memory_budget)
+    return 0 if reports and all(r["status"] == "ok" for r in reports) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,584 @@
+# @title PartD - Pipelined Runner
+'''
+Pipelined version of Parts B–C for one ontology. Instead of parse -> extract -> write
+eight CSVs -> read them back -> generate, the stages run concurrently:
+
+    parser process  --triple chunks-->  extraction (main thread)
+    extraction      --labels, hierarchy edges, relation frames-->  generation thread
+
+Both links are bounded queues, so a slow consumer holds the producer back instead of
+buffering the whole file. A template's frame is handed to generation as soon as its
+LIMITS row count is reached (--sampling first-n); templates that need the whole graph
+(sibling, chain) and templates that never fill up are handed over when parsing ends.
+With the default --sampling reservoir, every template draws the same seeded reservoir
+sample as PartB_Relation_extractor.py, so frames are handed over when parsing ends.
+
+Labels and hierarchy edges travel on the same queue as the frames, so generation of an
+early family sees exactly the labels parsed before it (deterministic for a given file).
+Label choice follows PartC: most frequent string-literal property, then rdfs:label, then
+the first object of the subject. Early families use the provisional most frequent property.
+
+Usage:
+    python PartD_Pipelined_runner.py cinema.owl --out Output/pipelined
+'''
+
+import os, sys, csv, time, queue, random, argparse, threading, traceback
+import multiprocessing as mp
+from rdflib import Graph, Literal, RDF, RDFS, OWL, XSD
+from Utility_Files import get_label, ensure_dir, run_stage, ReservoirSampler
+import MCQ_Core as core
+from MCQ_Dedup import Deduplicator
+from Star_Join import is_data_role, evaluate_pattern, pattern_frame
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Same row limits as PartB_Relation_extractor.py
+LIMITS = {
+    "taxonomy": 200,
+    "role": 200,
+    "chain": 200,
+    "sibling": 200,
+    "data": 200,
+    "directed": 150,
+    "acted": 150,
+    "released": 150
+}
+
+# Same sampling settings as PartB_Relation_extractor.py
+SAMPLING_SEED = 42
+STRATIFY = {
+    "taxonomy": None,
+    "role": "property",
+    "chain": "property",
+    "sibling": "class",
+    "data": "property",
+    "directed": None,
+    "acted": None,
+    "released": None
+}
+# Extractor row keys -> LIMITS / STRATIFY / sampler names used by PartB
+LIMIT_KEYS = {"taxonomy": "taxonomy", "role": "role", "chain": "chain", "sibling": "sibling", "data": "data",
+              "director": "directed", "actor": "acted", "release": "released"}
+
+CHUNK_SIZE = 5000        # triples per message from the parser process
+TRIPLE_QUEUE_SIZE = 8    # chunks buffered between parser and extraction
+FRAME_QUEUE_SIZE = 64    # messages buffered between extraction and generation
+
+RDF_TYPE, SUBCLASS_OF, RDFS_LABEL = str(RDF.type), str(RDFS.subClassOf), str(RDFS.label)
+OBJECT_PROPERTY, DATATYPE_PROPERTY = str(OWL.ObjectProperty), str(OWL.DatatypeProperty)
+OWL_NS = str(OWL)
+STRING_DATATYPES = (None, str(XSD.string))
+
+# Parser process
+class TripleStreamGraph(Graph):
+    """
+    Graph whose add() forwards triples to a queue instead of storing them.
+    Literals are sent as (lexical, datatype, language) tuples, everything else as str.
+    """
+    def __init__(self, out_q, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        self._out_q = out_q
+        self._chunk_size = chunk_size
+        self._chunk = []
+
+    def add(self, triple):
+        s, p, o = triple
+        if isinstance(o, Literal):
+            o = (str(o), str(o.datatype) if o.datatype else None, o.language)
+        else:
+            o = str(o)
+        self._chunk.append((str(s), str(p), o))
+        if len(self._chunk) >= self._chunk_size:
+            self.flush()
+        return self
+
+    def addN(self, quads):
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+        return self
+
+    def flush(self):
+        if self._chunk:
+            self._out_q.put(self._chunk)  # blocks while the queue is full
+            self._chunk = []
+
+def parse_worker(owl_path, out_q):
+    """Parser process: streams the ontology's triples, then None (or an error string)."""
+    try:
+        sink = TripleStreamGraph(out_q)
+        sink.parse(owl_path, format="xml")
+        sink.flush()
+        out_q.put(None)
+    except Exception:
+        out_q.put(traceback.format_exc())
+
+# Streaming extraction
+def frag_label(uri):
+    """Same label column values PartB_Relation_extractor.safe_get_label() writes."""
+    try:
+        return get_label(uri)
+    except Exception:
+        return uri.split("#")[-1] if "#" in uri else uri.split("/")[-1]
+
+class StreamingExtractor:
+    """
+    Builds the relation templates of PartB_Relation_extractor.py incrementally from a
+    triple stream and calls emit(kind, payload) whenever something is ready for generation.
+    sampling="reservoir" keeps a seeded sample of the whole graph per template;
+    sampling="first-n" keeps the first LIMITS rows and hands them over immediately.
+    """
+    def __init__(self, emit, limits=LIMITS, seed=SAMPLING_SEED, sampling="reservoir", stratify=STRATIFY,
+                 patterns=None):
+        self.emit = emit
+        self.limits = limits
+        self.seed = seed
+        self.sampling = sampling
+        self.stratify = stratify
+        self.samplers = {key: ReservoirSampler(limits[lk], seed, lk) for key, lk in LIMIT_KEYS.items()}
+        self.types = {}                  # subject -> first non-OWL rdf:type seen
+        self.type_sets = {}              # subject -> every rdf:type (as MCQ_Core.entity_types)
+        self.obj_props, self.data_props = [], []
+        self.prop_kind = {}              # property -> "object" / "data"
+        self.pending = {}                # untyped property -> first (s, o) pairs seen
+        self.index = {}                  # property -> subject -> [objects] (URI objects only)
+        # composite patterns: literal values are indexed only for data-role keywords
+        self.patterns = patterns or {}
+        self.literal_keywords = [kw for pat in self.patterns.values() for role in pat["roles"].values()
+                                 if is_data_role(role) for kw in role["properties"]]
+        self.literal_index = {}          # property -> subject -> [lexical values]
+        self.literal_props = {}          # property -> whether it is kept in literal_index
+        self.subclass_edges = []
+        self.rows = {k: [] for k in ["taxonomy", "role", "data", "director", "actor", "release"]}
+        self.row_limits = {key: limits[lk] for key, lk in LIMIT_KEYS.items()}
+        self.emitted = set()
+        self.ready = []                  # templates that filled up during the current chunk
+        # label bookkeeping
+        self.pred_counts = {}
+        self.string_preds = set()
+        self.label_cands = {}            # subject -> {predicate: first string literal}
+        self.first_obj = {}              # subject -> first object seen
+        self.found_label = None
+        self.dirty = set()
+        self.edges_out = []
+
+    # Feeding
+    def feed(self, chunk):
+        for s, p, o in chunk:
+            self._add(sys.intern(s), sys.intern(p), o)
+        self._flush_updates()
+
+    def _add(self, s, p, o):
+        literal = type(o) is tuple
+        if not literal:
+            o = sys.intern(o)
+
+        self.pred_counts[p] = self.pred_counts.get(p, 0) + 1
+        if s not in self.first_obj:
+            self.first_obj[s] = o[0] if literal else o
+            self.dirty.add(s)
+        if literal and o[1] in STRING_DATATYPES:
+            self.string_preds.add(p)
+            cands = self.label_cands.setdefault(s, {})
+            if p not in cands:
+                cands[p] = o[0]
+                self.dirty.add(s)
+
+        if p == RDF_TYPE and not literal:
+            self.type_sets.setdefault(s, set()).add(o)
+        if p == RDF_TYPE and o in (OBJECT_PROPERTY, DATATYPE_PROPERTY):
+            self._declare(s, "object" if o == OBJECT_PROPERTY else "data")
+        elif p == RDF_TYPE and not literal and not o.startswith(OWL_NS) and s not in self.types:
+            self.types[s] = o
+        elif p == SUBCLASS_OF:
+            edge = (s, o[0] if literal else o)
+            self.subclass_edges.append(edge)
+            self._add_row("taxonomy", edge, self._stratum("taxonomy", p, s, edge[1]))
+
+        if not literal:
+            self.index.setdefault(p, {}).setdefault(s, []).append(o)
+        elif self._keeps_literals(p):
+            self.literal_index.setdefault(p, {}).setdefault(s, []).append(o[0])
+
+        kind = self.prop_kind.get(p)
+        if kind:
+            self._route(p, kind, s, o)
+        elif p not in (RDF_TYPE, SUBCLASS_OF):
+            buf = self.pending.setdefault(p, [])
+            if len(buf) < max(self.limits.values()):
+                buf.append((s, o))
+
+    def _keeps_literals(self, p):
+        keep = self.literal_props.get(p)
+        if keep is None:
+            keep = self.literal_props[p] = any(kw in p.lower() for kw in self.literal_keywords)
+        return keep
+
+    def _declare(self, p, kind):
+        if p in self.prop_kind:
+            return
+        self.prop_kind[p] = kind
+        (self.obj_props if kind == "object" else self.data_props).append(p)
+        for s, o in self.pending.pop(p, []):
+            self._route(p, kind, s, o)
+
+    def _route(self, p, kind, s, o):
+        """Sends one typed-property triple to every template that accepts it."""
+        lp = p.lower()
+        literal = type(o) is tuple
+        if kind == "object" and not literal:
+            row = (p, s, o)
+            self._add_row("role", row, self._stratum("role", p, s))
+            if "director" in lp:
+                self._add_row("director", row, self._stratum("director", p, s))
+            if "actor" in lp or "starring" in lp:
+                self._add_row("actor", row, self._stratum("actor", p, s))
+        elif kind == "data" and literal:
+            row = (p, s, o[0])
+            self._add_row("data", row, self._stratum("data", p, s))
+            if any(kw in lp for kw in ["date", "year", "release"]):
+                self._add_row("release", row, self._stratum("release", p, s))
+
+    def _stratum(self, key, prop, subject, parent=None):
+        """Same strata as PartB's stratum(); a subject's class is its first rdf:type parsed so far."""
+        mode = self.stratify.get(LIMIT_KEYS[key])
+        if mode == "property":
+            return prop
+        if mode == "class":
+            return parent if parent is not None else self.types.get(subject)
+        return None
+
+    def _add_row(self, key, row, stratum=None):
+        if self.sampling == "reservoir":
+            self.samplers[key].add(row, stratum)
+            return
+        rows = self.rows[key]
+        if key in self.emitted or len(rows) >= self.row_limits[key]:
+            return
+        rows.append(row)
+        if key == "taxonomy":
+            self.edges_out.append((frag_label(row[0]), frag_label(row[1])))
+        if len(rows) >= self.row_limits[key]:
+            self.ready.append(key)
+
+    # Labels
+    def _best_label(self, s):
+        cands = self.label_cands.get(s, {})
+        return cands.get(self.found_label) or cands.get(RDFS_LABEL) or self.first_obj.get(s)
+
+    def _flush_updates(self):
+        """Sends label changes, hierarchy edges, then any frames that filled up in this chunk."""
+        leader = max(self.string_preds, key=lambda p: self.pred_counts[p]) if self.string_preds else RDFS_LABEL
+        if leader != self.found_label:
+            self.found_label = leader
+            self.dirty = set(self.first_obj)
+        if self.dirty:
+            self.emit("labels", [(s, self._best_label(s)) for s in self.dirty])
+            self.dirty = set()
+        if self.edges_out:
+            self.emit("edges", self.edges_out)
+            self.edges_out = []
+        for key in self.ready:
+            self._emit_frame(key)
+        self.ready = []
+
+    # Frames
+    def _emit_frame(self, key):
+        if key in self.emitted:
+            return
+        self.emitted.add(key)
+        self.emit("frame", (key, self.build_frame(key)))
+
+    def build_frame(self, key):
+        """DataFrame with the columns PartB_Relation_extractor.py writes for this template."""
+        pd = core.pd
+        rows = self.rows.get(key, [])
+        if key == "taxonomy":
+            df = pd.DataFrame(rows, columns=["child", "parent"])
+            df["child_label"] = [frag_label(x) for x in df["child"]]
+            df["parent_label"] = [frag_label(x) for x in df["parent"]]
+        elif key == "role":
+            df = pd.DataFrame(rows, columns=["property", "subject", "object"])
+            for col in ["property", "subject", "object"]:
+                df[f"{col}_label"] = [frag_label(x) for x in df[col]]
+        elif key == "data":
+            df = pd.DataFrame(rows, columns=["property", "subject", "value"])
+            df["property_label"] = [frag_label(x) for x in df["property"]]
+            df["subject_label"] = [frag_label(x) for x in df["subject"]]
+            df["value_str"] = df["value"].astype(str)
+        elif key in ("director", "actor"):
+            df = pd.DataFrame(rows, columns=["property", "movie", key])
+            for col in ["property", "movie", key]:
+                df[f"{col}_label"] = [frag_label(x) for x in df[col]]
+        elif key == "release":
+            df = pd.DataFrame(rows, columns=["property", "movie", "date"])
+            df["property_label"] = [frag_label(x) for x in df["property"]]
+            df["movie_label"] = [frag_label(x) for x in df["movie"]]
+            df["date_str"] = df["date"].astype(str)
+        elif key == "chain":
+            df = pd.DataFrame(rows, columns=["prop1", "prop2", "x", "y", "z"])
+            for col in ["prop1", "prop2", "x", "y", "z"]:
+                df[f"{col}_label"] = [frag_label(v) for v in df[col]]
+        else:  # sibling
+            df = pd.DataFrame(rows, columns=["entity1", "entity2", "parent"])
+            for col in ["entity1", "entity2", "parent"]:
+                df[f"{col}_label"] = [frag_label(v) for v in df[col]]
+        return df
+
+    def finish(self):
+        """End of parse: build the whole-graph templates and hand over everything left."""
+        self._flush_updates()
+        # Type signatures for the distractor index (families already generated in
+        # first-n mode go without it)
+        self.emit("types", self.type_sets)
+        if self.sampling == "reservoir":
+            self._finish_reservoir()
+        else:
+            self._finish_first_n()
+        for key in ["taxonomy", "role", "chain", "sibling", "data", "director", "actor", "release"]:
+            if self.rows.get(key):
+                self._emit_frame(key)
+        # Composite patterns: star joins over the full property indexes
+        for name, pattern in self.patterns.items():
+            rows, _ = evaluate_pattern(name, pattern, self._pairs, self.obj_props, self.data_props, self.seed)
+            self.emit("frame", (name, pattern_frame(pattern, rows, frag_label)))
+
+    def _pairs(self, p, is_data):
+        index = self.literal_index if is_data else self.index
+        for s, values in index.get(p, {}).items():
+            for v in values:
+                yield s, v
+
+    def _prop_sample(self):
+        """The 20 object properties chains are built from (same seeded pick as PartB)."""
+        props = sorted(self.obj_props)
+        return random.Random(self.seed).sample(props, min(20, len(props)))
+
+    def _finish_reservoir(self):
+        # Relational chains: every x -p1-> y -p2-> z path over the sampled properties
+        chain = self.samplers["chain"]
+        sample = self._prop_sample()
+        for p1 in sample:
+            for p2 in sample:
+                by_subject = self.index.get(p2, {})
+                for x, ys in self.index.get(p1, {}).items():
+                    for y in ys:
+                        for z in by_subject.get(y, ()):
+                            chain.add((p1, p2, x, y, z), self._stratum("chain", (p1, p2), x))
+
+        # Sibling classes: every ordered pair of distinct children sharing a parent
+        sibling = self.samplers["sibling"]
+        children = {}
+        for child, parent in self.subclass_edges:
+            children.setdefault(parent, []).append(child)
+        for parent, kids in children.items():
+            st = self._stratum("sibling", SUBCLASS_OF, None, parent)
+            for e1 in kids:
+                for e2 in kids:
+                    if e1 != e2:
+                        sibling.add((e1, e2, parent), st)
+
+        for key, sampler in self.samplers.items():
+            self.rows[key] = sampler.rows()
+        # The hierarchy PartC builds from the taxonomy frame
+        self.emit("edges", [(frag_label(c), frag_label(p)) for c, p in self.rows["taxonomy"]])
+
+    def _finish_first_n(self):
+        # Relational chains over the object-property index, up to 10 per property pair
+        sample = self._prop_sample()
+        chain_rows = []
+        for p1 in sample:
+            for p2 in sample:
+                if len(chain_rows) >= self.limits["chain"]:
+                    break
+                by_subject = self.index.get(p2, {})
+                found = 0
+                for x, ys in self.index.get(p1, {}).items():
+                    for y in ys:
+                        for z in by_subject.get(y, []):
+                            chain_rows.append((p1, p2, x, y, z))
+                            found += 1
+                            if found >= 10:
+                                break
+                        if found >= 10:
+                            break
+                    if found >= 10:
+                        break
+            if len(chain_rows) >= self.limits["chain"]:
+                break
+        self.rows["chain"] = chain_rows
+
+        # Sibling classes: pairs of distinct children sharing a parent
+        children = {}
+        for child, parent in self.subclass_edges:
+            children.setdefault(parent, []).append(child)
+        sib_rows = []
+        for parent, kids in children.items():
+            for e1 in kids:
+                for e2 in kids:
+                    if e1 != e2 and len(sib_rows) < self.limits["sibling"]:
+                        sib_rows.append((e1, e2, parent))
+        self.rows["sibling"] = sib_rows
+
+# Generation
+def generation_worker(in_q, csv_path, state):
+    """
+    Generation thread: applies label/hierarchy updates and runs each MCQ family as soon
+    as its input frames have arrived. Rows are appended to csv_path as they are generated.
+    """
+    frames, done = {}, set()
+    frag_owner = {}  # fragment -> IRI whose label it currently carries
+    dedup = state["dedup"]
+    try:
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(core.MCQ_COLUMNS)
+            while True:
+                msg = in_q.get()
+                if msg is None:
+                    break
+                kind, payload = msg
+                if kind == "labels":
+                    for s, lbl in payload:
+                        # A fragment shared by several IRIs keeps the label of the largest
+                        # one, as build_label_maps (which sets labels in IRI order) does
+                        frag = core.uri_fragment(s)
+                        if s >= frag_owner.setdefault(frag, s):
+                            frag_owner[frag] = s
+                            core.set_label(s, lbl)
+                        else:
+                            core.uri_to_label[s] = lbl or frag
+                elif kind == "edges":
+                    for child, parent in payload:
+                        core.add_hierarchy_edge(core.resolve_label(core.clean(child)),
+                                                core.resolve_label(core.clean(parent)))
+                elif kind == "types":
+                    core.build_distractor_index(payload)
+                elif kind == "frame":
+                    key, df = payload
+                    frames[key] = df
+                    state["frame_times"][key] = time.time() - state["start"]
+                    for fam in core.FAMILY_GENERATORS:
+                        if fam in done or not all(k in frames for k in core.FAMILY_INPUTS[fam]):
+                            continue
+                        done.add(fam)
+                        rows = dedup.filter_rows(core.generate_family(fam, frames), core.MCQ_COLUMNS)
+                        if rows and state["first_question"] is None:
+                            state["first_question"] = time.time() - state["start"]
+                        writer.writerows(rows)
+                        f.flush()
+                        state["rows"] += rows
+    except Exception:
+        state["error"] = traceback.format_exc()
+        # keep draining so the extraction side never blocks on a full queue
+        while in_q.get() is not None:
+            pass
+
+def ensure_templates(templates_path, out_dir):
+    """
+    Loads question_templates.json and the composite_patterns.json next to it,
+    creating both with PartB_Template_generator if the templates are missing.
+    """
+    if not os.path.exists(templates_path):
+        prev_cwd = os.getcwd()
+        try:
+            os.chdir(out_dir)
+            run_stage(os.path.join(REPO_DIR, "PartB_Template_generator.py"), {"__name__": "__main__"})
+        finally:
+            os.chdir(prev_cwd)
+        templates_path = os.path.join(out_dir, "question_templates.json")
+    patterns_path = os.path.join(os.path.dirname(templates_path), "composite_patterns.json")
+    return core.load_templates(templates_path), core.load_composite_patterns(patterns_path)
+
+def run_pipelined(owl_path, out_dir=".", templates_path="question_templates.json", sampling="reservoir",
+                  templates=None, patterns=None, bank_path=None, ontology=None):
+    """
+    Runs parse, extraction and generation concurrently; returns the MCQ DataFrame.
+    Already loaded templates and patterns (the batch runner's) skip templates_path; with
+    bank_path, questions the bank already covers for `ontology` (default: the file name)
+    are dropped as in PartC.
+    """
+    ensure_dir(out_dir)
+    if templates is None or patterns is None:
+        templates, patterns = ensure_templates(templates_path, out_dir)
+    core.set_composite_patterns(patterns)
+    core.set_templates(templates)
+    core.uri_to_label.clear()
+    core.frag_to_label.clear()
+    core.parent_of.clear()
+    core.children_of.clear()
+    core.distractor_index = None
+    core.similar_labels.clear()
+    random.seed(core.RANDOM_SEED)
+
+    bank = None
+    if bank_path:
+        from Question_Bank import QuestionBank, ontology_name
+        bank = QuestionBank(bank_path)
+        ontology = ontology or ontology_name(owl_path)
+    state = {"start": time.time(), "first_question": None, "frame_times": {}, "rows": [], "error": None,
+             "dedup": Deduplicator(bank, ontology=ontology)}
+    triple_q = mp.Queue(maxsize=TRIPLE_QUEUE_SIZE)
+    frame_q = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+
+    parser = mp.Process(target=parse_worker, args=(os.path.abspath(owl_path), triple_q), daemon=True)
+    parser.start()
+    stream_csv = os.path.join(out_dir, "generated_mcqs.csv")
+    generator = threading.Thread(target=generation_worker, args=(frame_q, stream_csv, state), daemon=True)
+    generator.start()
+
+    extractor = StreamingExtractor(lambda kind, payload: frame_q.put((kind, payload)), sampling=sampling,
+                                   patterns=patterns)
+    n_triples, error = 0, None
+    try:
+        while True:
+            chunk = triple_q.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, str):
+                error = chunk
+                break
+            n_triples += len(chunk)
+            extractor.feed(chunk)
+        parse_seconds = time.time() - state["start"]
+        if error is None:
+            extractor.finish()
+    finally:
+        frame_q.put(None)
+        generator.join()
+        if error is not None or sys.exc_info()[0] is not None:
+            parser.terminate()
+        parser.join()
+        if bank is not None:
+            bank.close()
+
+    if error or state["error"]:
+        raise RuntimeError(f"Pipelined run failed:\n{error or state['error']}")
+
+    # Same shuffled layout as PartC_MCQ_generator.py once everything is in
+    df_mcq = core.to_mcq_frame(state["rows"])
+    df_mcq.to_csv(stream_csv, index=False)
+
+    total = time.time() - state["start"]
+    print(f"Parsed {n_triples} triples in {parse_seconds:.2f}s (label property: {extractor.found_label})")
+    for key, t in state["frame_times"].items():
+        print(f"  {key:<9} rows ready at {t:6.2f}s")
+    if state["first_question"] is not None:
+        print(f"Time to first question: {state['first_question']:.2f}s")
+    print(f"Generated {len(df_mcq)} MCQs in {total:.2f}s -> {stream_csv} "
+          f"({state['dedup'].total_removed()} duplicates removed)")
+    return df_mcq
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipelined MCQ generation for one ontology.")
+    parser.add_argument("ontology", help="OWL (RDF/XML) file")
+    parser.add_argument("--out", default=".", help="folder for generated_mcqs.csv")
+    parser.add_argument("--templates", default="question_templates.json",
+                        help="question templates (generated if missing)")
+    parser.add_argument("--sampling", choices=["reservoir", "first-n"], default="reservoir",
+                        help="seeded sample of the whole graph, or first LIMITS rows handed over early")
+    args = parser.parse_args(argv)
+    run_pipelined(args.ontology, args.out, args.templates, args.sampling)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,533 @@
+# @title PartD - Sharded Runner
+'''
+Sharded version of Parts B–C for one large ontology. Subjects are partitioned by a
+stable hash (Utility_Files.shard_of) into N shards, and every shard only loads, extracts
+and generates the questions about its own subjects:
+
+    0. partition the file is cut between its top-level elements into N pieces; shard i
+                 parses piece i without building a graph and routes every triple to the
+                 shard that needs it (partition/piece_<k>_shard_<i>.pkl): the triples of
+                 the shard's subjects, a copy of every edge pointing at them (chains are
+                 extracted by their middle entity), and the property declarations and
+                 subClassOf triples every shard needs
+    1. extract   each shard loads only its partition, runs PartB_Relation_extractor.py with
+                 SHARD = (i, N) and keeps every per-stratum reservoir entry of its subjects,
+                 plus the labels and rdf:types of its subjects (shard_<i>/)
+    2. samples   the shards' entries are sampled again into the single-run template CSVs
+                 (shared/). These few hundred rows per template are the artifact every
+                 shard reads its distractor pools from. The shards' labels and types become
+                 the entity table and distractor index of the whole graph
+                 (shared/entities.bin, shared/distractor_index.bin).
+    3. generate  each shard generates the MCQs of its own rows of the shared frames
+                 (shard_<i>/mcqs.csv, before dedup), reading labels from the memory-mapped
+                 entity table, so no shard needs its graph any more
+    4. merge     all shard rows are put in canonical order (MCQ_Core.order_rows),
+                 deduplicated and shuffled exactly as PartC does (generated_mcqs.csv)
+
+Reservoir priorities, template variants and distractor random streams depend only on the
+rows themselves, so the output is identical to a single-process run for any N.
+Run locally, every shard is one process that drops its graph after step 1.
+Every shard parses, loads and indexes only about 1/N of the graph; what does not shrink
+with N is the split scan of the file, step 2 and step 4 (see README for measured scaling).
+With --memory-budget, only as many shards as the budget allows (Utility_Files.estimate_peak_mb,
+scaled to the shard's share of the triples) hold a graph at the same time; the others wait
+for a slot. Peak RSS is reported per step.
+On several machines sharing a folder, run the steps separately with --phase.
+
+Usage:
+    python PartD_Sharded_runner.py cinema.owl --shards 4 --out Output/sharded
+    python PartD_Sharded_runner.py cinema.owl --shards 4 --out shared_dir --phase partition --shard 0
+    python PartD_Sharded_runner.py cinema.owl --shards 4 --out shared_dir --phase extract --shard 0
+    python PartD_Sharded_runner.py cinema.owl --shards 4 --out shared_dir --phase samples
+    python PartD_Sharded_runner.py cinema.owl --shards 4 --out shared_dir --phase generate --shard 0
+    python PartD_Sharded_runner.py cinema.owl --shards 4 --out shared_dir --phase merge
+'''
+
+import os, gc, sys, csv, json, time, queue, bisect, pickle, pathlib, argparse, traceback, contextlib
+import xml.parsers.expat
+import multiprocessing as mp
+import pandas as pd
+from rdflib import Graph, Namespace, URIRef, Literal, RDF, RDFS, OWL
+from Utility_Files import (run_stage, ensure_dir, ReservoirSampler, shard_of, estimate_peak_mb, BASE_PEAK_MB,
+                           memory_budget_mb, MemoryReport)
+import MCQ_Core as core
+from MCQ_Dedup import dedup_rows
+from Question_Bank import ontology_name
+from Entity_Table import EntityTable
+from Distractor_Index import DistractorIndex
+from PartD_Batch_runner import load_templates
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = "shared"
+PARTITION_DIR = "partition"
+TABLE_FILE = "entities.bin"
+INDEX_FILE = "distractor_index.bin"
+ENTITIES_FILE = "entities.pkl"   # a shard's (labels, rdf:types) of its own subjects
+CHUNK_SIZE = 5000                # triples per pickled chunk of a partition file
+# rdf:type objects whose triples every shard keeps (PartB lists the properties by them)
+DECLARATIONS = (OWL.ObjectProperty, OWL.DatatypeProperty)
+
+def shard_dir(out_dir, shard):
+    return os.path.join(out_dir, f"shard_{shard}")
+
+def read_text_csv(path):
+    """CSV with every cell as the exact text written (no type guessing, no NaN)."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def in_dir(path, stages, session, log_name):
+    """Runs pipeline stages inside path with their output sent to log_name."""
+    prev_cwd = os.getcwd()
+    try:
+        ensure_dir(path)
+        os.chdir(path)
+        with open(log_name, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+            for stage in stages:
+                run_stage(os.path.join(REPO_DIR, stage), session)
+    finally:
+        os.chdir(prev_cwd)
+    return session
+
+def partition_file(out_dir, piece, shard):
+    return os.path.join(out_dir, PARTITION_DIR, f"piece_{piece}_shard_{shard}.pkl")
+
+def piece_manifest(out_dir, piece):
+    return os.path.join(out_dir, PARTITION_DIR, f"piece_{piece}.json")
+
+# Step 0
+def split_points(data, pieces):
+    """
+    Byte ranges of the file that parse on their own: (prolog, [(start, end), ...], trailer).
+    An rdf:RDF document is cut between its top-level elements into about equal pieces; every
+    piece is parsed as prolog + range + trailer, which keeps the namespaces, xml:base and
+    entities of the root. Files with rdf:nodeID (blank nodes shared across elements) or
+    another root stay in one piece.
+    """
+    parser = xml.parsers.expat.ParserCreate()
+    depth, root, starts, close = 0, None, [], None
+
+    def start(name, attrs):
+        nonlocal depth, root
+        if depth == 0:
+            root = name
+        elif depth == 1:
+            starts.append(parser.CurrentByteIndex)
+        depth += 1
+
+    def end(name):
+        nonlocal depth, close
+        depth -= 1
+        if depth == 0:
+            close = parser.CurrentByteIndex
+
+    parser.StartElementHandler, parser.EndElementHandler = start, end
+    parser.Parse(data, True)
+    if not starts or not root.endswith("RDF") or b"nodeID" in data:
+        return data, [], b""
+    bounds = [starts[0]]
+    for k in range(1, pieces):
+        target = starts[0] + (close - starts[0]) * k // pieces
+        cut = starts[bisect.bisect_left(starts, target)] if target <= starts[-1] else close
+        if cut > bounds[-1]:
+            bounds.append(cut)
+    if close > bounds[-1]:
+        bounds.append(close)
+    return data[:starts[0]], list(zip(bounds, bounds[1:])), data[close:]
+
+class PartitionSink(Graph):
+    """
+    Graph whose add() routes parsed triples to the shards' partition files instead of
+    storing them, in parse order. It also counts what PartB_Rdf_graph_builder.py detects
+    on the whole graph: string-literal properties, property frequencies, ontology IRIs.
+    """
+    def __init__(self, files, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        self.files, self.chunk_size = files, chunk_size
+        self.chunks = [[] for _ in files]
+        self.counts = [0] * len(files)
+        self.parsed = 0
+        self.prop_counts, self.literal_props, self.ontology_iris = {}, {}, []
+
+    def add(self, triple):
+        s, p, o = triple
+        n = len(self.files)
+        self.parsed += 1
+        self.prop_counts[p] = self.prop_counts.get(p, 0) + 1
+        if isinstance(o, Literal):
+            if p not in self.literal_props and isinstance(o.value, str):
+                self.literal_props[p] = True
+            targets = (shard_of(s, n),)
+        elif p == RDFS.subClassOf or (p == RDF.type and o in DECLARATIONS):
+            targets = range(n)
+        elif p == RDF.type:
+            if o == OWL.Ontology:
+                self.ontology_iris.append(s)
+            targets = (shard_of(s, n),)
+        else:
+            # An edge also goes to its object's shard, which extracts the chains through it
+            targets = {shard_of(s, n), shard_of(o, n)}
+        for i in targets:
+            self.chunks[i].append(triple)
+            if len(self.chunks[i]) >= self.chunk_size:
+                self._flush(i)
+        return self
+
+    def addN(self, quads):
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+        return self
+
+    def _flush(self, i):
+        if self.chunks[i]:
+            pickle.dump(self.chunks[i], self.files[i], protocol=pickle.HIGHEST_PROTOCOL)
+            self.counts[i] += len(self.chunks[i])
+            self.chunks[i] = []
+
+    def flush(self):
+        for i in range(len(self.files)):
+            self._flush(i)
+
+def partition_piece(owl_path, out_dir, piece, shards):
+    """
+    Parses piece `piece` of the file (one per shard, see split_points) and routes its triples
+    to partition/piece_<piece>_shard_<i>.pkl, with what it counted in partition/piece_<piece>.json.
+    """
+    ensure_dir(os.path.join(out_dir, PARTITION_DIR))
+    with open(owl_path, "rb") as f:
+        data = f.read()
+    prolog, ranges, trailer = split_points(data, shards)
+    files = [open(partition_file(out_dir, piece, i), "wb") for i in range(shards)]
+    try:
+        sink = PartitionSink(files)
+        if not ranges and piece == 0:
+            sink.parse(owl_path, format="xml")
+        elif piece < len(ranges):
+            start, end = ranges[piece]
+            # Same base IRI as parsing the whole file
+            sink.parse(data=prolog + data[start:end] + trailer, format="xml",
+                       publicID=pathlib.Path(owl_path).absolute().as_uri())
+        del data
+        sink.flush()
+    finally:
+        for f in files:
+            f.close()
+    manifest = {"ontology": os.path.abspath(owl_path), "shards": shards, "parsed": sink.parsed,
+                "triples": sink.counts, "prop_counts": {str(p): n for p, n in sink.prop_counts.items()},
+                "literal_props": [str(p) for p in sink.literal_props],
+                "ontology_iris": [str(s) for s in sink.ontology_iris],
+                "namespaces": [str(ns) for _, ns in sink.namespaces()]}
+    with open(piece_manifest(out_dir, piece), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return manifest
+
+def read_partition(out_dir, shards):
+    """
+    The pieces' counts merged in file order: triples per shard and the label property and
+    base IRI as PartB_Rdf_graph_builder.py picks them from the whole graph.
+    """
+    pieces = []
+    for k in range(shards):
+        path = piece_manifest(out_dir, k)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} is missing: run --phase partition --shard {k}")
+        with open(path, "r", encoding="utf-8") as f:
+            pieces.append(json.load(f))
+        if pieces[-1]["shards"] != shards:
+            raise ValueError(f"{out_dir} is partitioned into {pieces[-1]['shards']} shards, not {shards}: "
+                             f"run --phase partition again")
+    prop_counts, literal_props, ontology_iris = {}, {}, []
+    for m in pieces:
+        for p, n in m["prop_counts"].items():
+            prop_counts[p] = prop_counts.get(p, 0) + n
+        literal_props.update(dict.fromkeys(m["literal_props"]))
+        ontology_iris += m["ontology_iris"]
+    found_label = max(literal_props, key=prop_counts.get) if literal_props else str(RDFS.label)
+    if ontology_iris:
+        base_iri = ontology_iris[0] + "#"
+    else:
+        ns_list = [ns for ns in pieces[0]["namespaces"] if not ns.startswith("http://www.w3.org/")]
+        base_iri = ns_list[0] if ns_list else "http://default.org/ontology#"
+    return {"ontology": pieces[0]["ontology"], "parsed": sum(m["parsed"] for m in pieces),
+            "triples": [sum(m["triples"][i] for m in pieces) for i in range(shards)],
+            "found_label": found_label, "base_iri": base_iri}
+
+def shard_peak_mb(owl_path, manifest, shard):
+    """estimate_peak_mb of the whole file, scaled to the shard's share of the parsed triples."""
+    share = manifest["triples"][shard] / max(1, manifest["parsed"])
+    return BASE_PEAK_MB + (estimate_peak_mb(owl_path) - BASE_PEAK_MB) * share
+
+# Step 1
+def load_partition(out_dir, shard, shards, budget_mb=None):
+    """Session with the graph `g` of one shard's partition and the whole file's label property."""
+    manifest = read_partition(out_dir, shards)
+    g = Graph()
+    for piece in range(shards):
+        with open(partition_file(out_dir, piece, shard), "rb") as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    break
+                g.addN((s, p, o, g) for s, p, o in chunk)
+    return {"__name__": "__main__", "owl_file": manifest["ontology"], "g": g, "GEN": Namespace(manifest["base_iri"]),
+            "found_label": URIRef(manifest["found_label"]), "MEMORY_BUDGET_MB": budget_mb}
+
+def extract_shard(session, out_dir, shard, shards, patterns):
+    """Runs PartB_Relation_extractor.py for one shard (writes its CSVs, samples.json and entities)."""
+    session.update({"SHARD": (shard, shards), "COMPOSITE_PATTERNS": patterns})
+    in_dir(shard_dir(out_dir, shard), ["PartB_Relation_extractor.py"], session, "extract.log")
+    write_shard_entities(session, out_dir, shard, shards)
+    return session
+
+def write_shard_entities(session, out_dir, shard, shards):
+    """
+    Labels and rdf:types of the shard's own subjects (every triple of a subject is in its
+    shard's partition, in parse order). Takes the graph out of the session.
+    """
+    g, found_label = session.pop("g"), session["found_label"]
+    labels = [(str(s), core.subject_label(g, s, found_label))
+              for s in set(g.subjects()) if shard_of(s, shards) == shard]
+    types = {s: t for s, t in core.entity_types(g).items() if shard_of(s, shards) == shard}
+    del g
+    with open(os.path.join(shard_dir(out_dir, shard), ENTITIES_FILE), "wb") as f:
+        pickle.dump((labels, types), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+# Step 2
+def merge_samples(out_dir, shards):
+    """
+    Samples the shards' reservoir entries again into the template CSVs of a single run.
+    Priorities are hashes of the raw row values, so the same rows win whatever shard held them.
+    """
+    shared = os.path.join(out_dir, SHARED_DIR)
+    ensure_dir(shared)
+    manifest = {}
+    for i in range(shards):
+        with open(os.path.join(shard_dir(out_dir, i), "samples.json"), "r", encoding="utf-8") as f:
+            manifest.update(json.load(f))
+    for name, spec in manifest.items():
+        paths = [os.path.join(shard_dir(out_dir, i), name) for i in range(shards)]
+        df = pd.concat([read_text_csv(p) for p in paths if os.path.exists(p)], ignore_index=True)
+        sampler = ReservoirSampler(spec["limit"], spec["seed"], spec["name"])
+        position = {}
+        for n, (st, row) in enumerate(zip(df["stratum"], df[spec["columns"]].itertuples(index=False, name=None))):
+            position[row] = n
+            sampler.add(row, st)
+        picked = [position[row] for row in sampler.rows()]
+        df.iloc[picked].drop(columns="stratum").to_csv(os.path.join(shared, name), index=False)
+
+def write_entity_artifacts(out_dir, shards):
+    """
+    Entity table and distractor index of the whole graph from the shards' labels and types,
+    shared by every shard's generation. Labels are set in IRI order, as build_label_maps does.
+    """
+    shared = os.path.join(out_dir, SHARED_DIR)
+    labels, types = [], {}
+    for i in range(shards):
+        with open(os.path.join(shard_dir(out_dir, i), ENTITIES_FILE), "rb") as f:
+            shard_labels, shard_types = pickle.load(f)
+        labels += shard_labels
+        types.update(shard_types)
+    core.use_entity_table(None)
+    for s, label in sorted(labels, key=lambda x: x[0]):
+        core.set_label(s, label)
+    del labels
+    EntityTable.from_maps(core.uri_to_label, core.frag_to_label).save(os.path.join(shared, TABLE_FILE))
+    core.build_distractor_index(types).save(os.path.join(shared, INDEX_FILE))
+    core.use_entity_table(None)
+    core.distractor_index = None
+
+# Step 3
+def generate_shard(out_dir, shard, shards, templates, patterns):
+    """Generates the MCQ rows (before dedup) of one shard's subjects from the shared artifacts."""
+    shared = os.path.join(out_dir, SHARED_DIR)
+    core.set_composite_patterns(patterns)
+    core.set_templates(templates)
+    core.use_entity_table(EntityTable.open(os.path.join(shared, TABLE_FILE)))
+    core.distractor_index = DistractorIndex.open(os.path.join(shared, INDEX_FILE))
+    frames = core.load_frames(shared)
+    core.build_hierarchy(frames["taxonomy"])
+    core.set_shard(shard, shards)
+    try:
+        rows = core.generate_all(frames)
+    finally:
+        core.set_shard()
+    with open(os.path.join(shard_dir(out_dir, shard), "mcqs.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(core.MCQ_COLUMNS)
+        writer.writerows(rows)
+    return len(rows)
+
+# Step 4
+def merge_mcqs(out_dir, shards, patterns, bank_path=None, ontology=None):
+    """
+    Canonical order, dedup (against the bank's questions of `ontology`) and the PartC
+    shuffle over every shard's rows; writes generated_mcqs.csv.
+    """
+    core.set_composite_patterns(patterns)
+    rows = []
+    for i in range(shards):
+        rows += read_text_csv(os.path.join(shard_dir(out_dir, i), "mcqs.csv"))[core.MCQ_COLUMNS].values.tolist()
+    bank = None
+    if bank_path:
+        from Question_Bank import QuestionBank
+        bank = QuestionBank(bank_path)
+    rows, dedup = dedup_rows(core.order_rows(rows), core.MCQ_COLUMNS, bank, ontology=ontology)
+    if bank is not None:
+        bank.close()
+    df_mcq = core.to_mcq_frame(rows)
+    df_mcq.to_csv(os.path.join(out_dir, "generated_mcqs.csv"), index=False)
+    return df_mcq, dedup
+
+# Local run: one process per shard
+def shard_worker(owl_path, out_dir, shard, shards, templates, patterns, partitioned, samples_ready, report_q,
+                 extract_slots=None, budget_mb=None):
+    """
+    Partitions its piece of the file, waits for every piece, extracts (holding one of
+    extract_slots while its graph is alive), waits for the shared frames, then generates;
+    reports each step's seconds and peak RSS on report_q.
+    """
+    memory = MemoryReport(budget_mb)
+    try:
+        t0 = time.time()
+        with memory.stage("partition"):
+            partition_piece(owl_path, out_dir, shard, shards)
+        report_q.put((shard, "partitioned", (time.time() - t0, memory.peaks["partition"])))
+        partitioned.wait()
+        with extract_slots or contextlib.nullcontext():
+            t0 = time.time()
+            with memory.stage("extract"):
+                session = load_partition(out_dir, shard, shards, budget_mb)
+                extract_shard(session, out_dir, shard, shards, patterns)
+                del session
+                gc.collect()
+        report_q.put((shard, "extracted", (time.time() - t0, memory.peaks["extract"])))
+        samples_ready.wait()
+        t0 = time.time()
+        with memory.stage("generate"):
+            n = generate_shard(out_dir, shard, shards, templates, patterns)
+        report_q.put((shard, "generated", (time.time() - t0, n, memory.peaks["generate"])))
+    except Exception:
+        report_q.put((shard, "failed", traceback.format_exc()))
+
+def wait_for(report_q, procs, step):
+    """Collects one `step` report per shard; raises when a shard fails or its process dies."""
+    results = {}
+    while len(results) < len(procs):
+        try:
+            shard, kind, payload = report_q.get(timeout=1)
+        except queue.Empty:
+            dead = [i for i, p in enumerate(procs) if p.exitcode not in (None, 0)]
+            if dead:
+                raise RuntimeError(f"Shard {dead[0]} exited with code {procs[dead[0]].exitcode}")
+            continue
+        if kind == "failed":
+            raise RuntimeError(f"Shard {shard} failed:\n{payload}")
+        if kind == step:
+            results[shard] = payload
+    return results
+
+def run_sharded(owl_path, out_dir=".", shards=2, templates_path="question_templates.json", bank_path=None,
+                budget_mb=None):
+    """Runs all five steps with one local process per shard; returns the MCQ DataFrame."""
+    ensure_dir(out_dir)
+    templates, patterns = load_templates(templates_path, out_dir)
+    start = time.time()
+    memory = MemoryReport(budget_mb)
+    partitioned, samples_ready, report_q = mp.Event(), mp.Event(), mp.Queue()
+    # Backpressure: a shard waits for a slot before it loads its graph (slots are added
+    # once the partition tells how large each shard's graph is)
+    extract_slots = mp.Semaphore(0) if budget_mb else None
+    procs = [mp.Process(target=shard_worker, daemon=True,
+                        args=(owl_path, out_dir, i, shards, templates, patterns, partitioned, samples_ready,
+                              report_q, extract_slots, budget_mb))
+             for i in range(shards)]
+    for p in procs:
+        p.start()
+    try:
+        partition_times = wait_for(report_q, procs, "partitioned")
+        manifest = read_partition(out_dir, shards)
+        if budget_mb:
+            need = max(shard_peak_mb(owl_path, manifest, i) for i in range(shards))
+            slots = max(1, min(shards, int(budget_mb // need)))
+            for _ in range(slots):
+                extract_slots.release()
+            print(f"Memory budget {budget_mb:g} MB: at most {slots} of {shards} shards extract at once")
+            if need > budget_mb:
+                print(f"Warning: one shard needs about {need:.0f} MB, over the budget; "
+                      f"run with more than {shards} shards")
+        partitioned.set()
+        extract_times = wait_for(report_q, procs, "extracted")
+        t0 = time.time()
+        with memory.stage("samples"):
+            merge_samples(out_dir, shards)
+            write_entity_artifacts(out_dir, shards)
+        samples_seconds = time.time() - t0
+        samples_ready.set()
+        generated = wait_for(report_q, procs, "generated")
+    except BaseException:
+        for p in procs:
+            p.terminate()
+        raise
+    finally:
+        for p in procs:
+            p.join()
+
+    t0 = time.time()
+    df_mcq, dedup = merge_mcqs(out_dir, shards, patterns, bank_path, ontology_name(owl_path))
+    merge_seconds = time.time() - t0
+    print(f"  {manifest['parsed']} triples partitioned into {manifest['triples']} per shard")
+    for i in range(shards):
+        print(f"  shard {i}: partition {partition_times[i][0]:6.2f}s (peak {partition_times[i][1]:.0f} MB), "
+              f"load + extract {extract_times[i][0]:6.2f}s (peak {extract_times[i][1]:.0f} MB), "
+              f"generate {generated[i][0]:6.2f}s (peak {generated[i][2]:.0f} MB, {generated[i][1]} rows)")
+    print(f"  samples and entity artifacts in {samples_seconds:.2f}s (peak {memory.peaks['samples']:.0f} MB), "
+          f"MCQs merged in {merge_seconds:.2f}s")
+    print(f"Generated {len(df_mcq)} MCQs on {shards} shards in {time.time() - start:.2f}s -> "
+          f"{os.path.join(out_dir, 'generated_mcqs.csv')} ({dedup.total_removed()} duplicates removed)")
+    return df_mcq
+
+def run_phase(phase, owl_path, out_dir, shards, shard=None, templates_path="question_templates.json",
+              bank_path=None, budget_mb=None):
+    """One step on its own, for shards running on separate machines that share out_dir."""
+    templates, patterns = load_templates(templates_path, out_dir)
+    memory = MemoryReport(budget_mb)
+    with memory.stage(phase if shard is None else f"{phase} (shard {shard})"):
+        if phase == "partition":
+            piece = partition_piece(owl_path, out_dir, shard, shards)
+            print(f"piece {shard}: {piece['parsed']} triples -> {piece['triples']} per shard")
+        elif phase == "extract":
+            extract_shard(load_partition(out_dir, shard, shards, budget_mb), out_dir, shard, shards, patterns)
+        elif phase == "samples":
+            merge_samples(out_dir, shards)
+            write_entity_artifacts(out_dir, shards)
+        elif phase == "generate":
+            print(f"{generate_shard(out_dir, shard, shards, templates, patterns)} rows")
+        elif phase == "merge":
+            df_mcq, dedup = merge_mcqs(out_dir, shards, patterns, bank_path, ontology_name(owl_path))
+            print(f"Generated {len(df_mcq)} MCQs ({dedup.total_removed()} duplicates removed)")
+    print("\n".join(memory.lines()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded MCQ generation for one ontology.")
+    parser.add_argument("ontology", help="OWL (RDF/XML) file")
+    parser.add_argument("--shards", type=int, default=2, help="number of shards")
+    parser.add_argument("--out", default=".", help="folder shared by all shards")
+    parser.add_argument("--templates", default="question_templates.json",
+                        help="question templates (generated if missing)")
+    parser.add_argument("--bank", default=None, help="SQLite question bank used by the merge dedup")
+    parser.add_argument("--phase", choices=["partition", "extract", "samples", "generate", "merge"], default=None,
+                        help="run one step only (default: all steps, one local process per shard)")
+    parser.add_argument("--shard", type=int, default=None, help="shard index for --phase partition/extract/generate")
+    parser.add_argument("--memory-budget", type=float, default=memory_budget_mb(), metavar="MB",
+                        help="memory budget of the run (default: $MCQ_MEMORY_BUDGET_MB, unbounded)")
+    args = parser.parse_args(argv)
+    if args.phase in ("partition", "extract", "generate") and args.shard is None:
+        parser.error(f"--phase {args.phase} needs --shard")
+    if args.phase:
+        run_phase(args.phase, args.ontology, args.out, args.shards, args.shard, args.templates, args.bank,
+                  args.memory_budget)
+    else:
+        run_sharded(args.ontology, args.out, args.shards, args.templates, args.bank, args.memory_budget)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
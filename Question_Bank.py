@@ -0,0 +1,331 @@
+# @title Question Bank Creation
+#%%writefile Question_Bank.py
+'''
+Persistent, indexed question bank on top of SQLite.
+Generation runs upsert their MCQs (one row per question, options in their own table);
+quiz assembly samples question ids from an in-memory per-family id cache and fetches
+only the chosen rows by primary key, so serving a quiz never reads generated_mcqs.csv.
+The id cache is rebuilt whenever another connection (a batch run, `ingest`) has
+committed since it was built, so a long-lived bank always samples the current rows.
+
+Usage:
+    python Question_Bank.py ingest generated_mcqs.csv --ontology cinema --db question_bank.sqlite
+    python Question_Bank.py quiz --db question_bank.sqlite --n 10 --family "Actor Question"
+    python Question_Bank.py bench --db question_bank.sqlite --n 10
+'''
+
+import os, sys, json, time, random, sqlite3, argparse
+import numpy as np
+from MCQ_Dedup import fingerprints, NUM_PERM, MAX_BUCKET_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id             INTEGER PRIMARY KEY,
+    ontology       TEXT NOT NULL,
+    family         TEXT NOT NULL,
+    question       TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    subject_id     TEXT NOT NULL DEFAULT '',
+    answer_id      TEXT NOT NULL DEFAULT '',
+    updated_at     REAL NOT NULL,
+    UNIQUE (ontology, question, correct_answer)
+);
+CREATE TABLE IF NOT EXISTS options (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    text        TEXT NOT NULL,
+    PRIMARY KEY (question_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_questions_family ON questions (ontology, family);
+CREATE INDEX IF NOT EXISTS idx_questions_subject ON questions (subject_id);
+CREATE INDEX IF NOT EXISTS idx_questions_answer ON questions (answer_id);
+-- Dedup fingerprints (see MCQ_Dedup.py): canonical fact key, MinHash signature, LSH buckets
+CREATE TABLE IF NOT EXISTS fingerprints (
+    question_id INTEGER PRIMARY KEY REFERENCES questions(id) ON DELETE CASCADE,
+    fact_key    TEXT,
+    signature   BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_fact ON fingerprints (fact_key);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    bucket      INTEGER NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (bucket, question_id)
+) WITHOUT ROWID;
+"""
+
+def split_distractors(value):
+    """Distractors from a comma-separated string (generated_mcqs.csv files without distractor_list)."""
+    if value is None or (isinstance(value, float) and value != value):
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(d).strip() for d in value if str(d).strip()]
+    return [d.strip() for d in str(value).split(",") if d.strip()]
+
+def record_distractors(r):
+    """A record's exact distractor labels: its distractor_list JSON when present, else the split text."""
+    value = r.get("distractor_list")
+    if isinstance(value, str) and value:
+        return [d for d in json.loads(value) if d]
+    return split_distractors(r.get("distractors"))
+
+def read_mcq_csv(path):
+    """generated_mcqs.csv with every cell as written (answers such as "None" or "N/A" stay text)."""
+    import pandas as pd
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def ontology_name(path):
+    """Name an ontology's questions are stored under: its file name without extension."""
+    return os.path.splitext(os.path.basename(str(path)))[0]
+
+def random_order(size, rng):
+    """Distinct random indices in [0, size), drawn lazily so a short quiz stays O(n)."""
+    seen = set()
+    while len(seen) < size:
+        if len(seen) > size // 2:
+            # dense: finish with a shuffled remainder
+            rest = [i for i in range(size) if i not in seen]
+            rng.shuffle(rest)
+            yield from rest
+            return
+        i = rng.randrange(size)
+        if i not in seen:
+            seen.add(i)
+            yield i
+
+class QuestionBank:
+    """
+    SQLite-backed MCQ store.
+    - upsert_mcqs(): insert or refresh questions from a generation run
+    - sample(): random questions of one family, optionally excluding entities
+    - assemble_quiz(): random quiz balanced across families
+    """
+    def __init__(self, path="question_bank.sqlite"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._ids = None     # (ontology, family) -> [(id, subject_id, answer_id)]
+        self._pools = {}     # (family, ontology) filter -> matching id tuples
+        self._version = None # PRAGMA data_version the caches were built at
+
+    def close(self):
+        self.conn.close()
+
+    # Writing
+    def upsert_mcqs(self, mcqs, ontology):
+        """
+        Inserts or updates MCQs from a DataFrame (generated_mcqs.csv layout) or a list of
+        row dicts. Questions are keyed by (ontology, question, correct_answer); their
+        options are replaced. Returns the number of rows written.
+        """
+        records = mcqs.to_dict("records") if hasattr(mcqs, "to_dict") else list(mcqs)
+        now = time.time()
+        with self.conn:
+            for r, (key, sig, buckets) in zip(records, fingerprints(records)):
+                cur = self.conn.execute(
+                    """INSERT INTO questions (ontology, family, question, correct_answer, subject_id, answer_id, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (ontology, question, correct_answer) DO UPDATE SET
+                           family = excluded.family,
+                           subject_id = excluded.subject_id,
+                           answer_id = excluded.answer_id,
+                           updated_at = excluded.updated_at
+                       RETURNING id""",
+                    (ontology, str(r.get("source_template", "")), str(r["question"]), str(r["correct_answer"]),
+                     self._text(r.get("subject_id")), self._text(r.get("answer_id")), now))
+                qid = cur.fetchone()[0]
+                self.conn.execute("DELETE FROM options WHERE question_id = ?", (qid,))
+                self.conn.executemany(
+                    "INSERT INTO options (question_id, position, text) VALUES (?, ?, ?)",
+                    [(qid, i, d) for i, d in enumerate(record_distractors(r))])
+                self.conn.execute("INSERT OR REPLACE INTO fingerprints (question_id, fact_key, signature) VALUES (?, ?, ?)",
+                                  (qid, key, sig.astype("<u4").tobytes()))
+                self.conn.execute("DELETE FROM lsh_buckets WHERE question_id = ?", (qid,))
+                self.conn.executemany("INSERT OR IGNORE INTO lsh_buckets (bucket, question_id) VALUES (?, ?)",
+                                      [(b, qid) for b in buckets])
+        self._ids = None
+        self._pools = {}
+        return len(records)
+
+    @staticmethod
+    def _text(value):
+        if value is None or (isinstance(value, float) and value != value):
+            return ""
+        return str(value)
+
+    # Reading
+    def _id_cache(self):
+        # data_version changes when another connection commits (this one's upserts reset the caches)
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._ids is None or version != self._version:
+            ids = {}
+            for qid, onto, fam, subj, ans in self.conn.execute(
+                    "SELECT id, ontology, family, subject_id, answer_id FROM questions ORDER BY id"):
+                ids.setdefault((onto, fam), []).append((qid, subj, ans))
+            self._ids, self._pools, self._version = ids, {}, version
+        return self._ids
+
+    def families(self, ontology=None):
+        """{family: question count}, optionally for one ontology."""
+        counts = {}
+        for (onto, fam), ids in self._id_cache().items():
+            if ontology is None or onto == ontology:
+                counts[fam] = counts.get(fam, 0) + len(ids)
+        return counts
+
+    def count(self):
+        return sum(len(v) for v in self._id_cache().values())
+
+    def _candidates(self, family, ontology):
+        cache = self._id_cache()
+        key = (family, ontology)
+        if key not in self._pools:
+            out = []
+            for (onto, fam), ids in cache.items():
+                if (family is None or fam == family) and (ontology is None or onto == ontology):
+                    out.extend(ids)
+            self._pools[key] = out
+        return self._pools[key]
+
+    def _pick(self, candidates, n, exclude, rng):
+        """Up to n random ids whose subject and answer are not in exclude (rejection sampling)."""
+        if not exclude:
+            return [c[0] for c in rng.sample(candidates, min(n, len(candidates)))]
+        picks = []
+        for i in random_order(len(candidates), rng):
+            qid, subj, ans = candidates[i]
+            if subj in exclude or ans in exclude:
+                continue
+            picks.append(qid)
+            if len(picks) >= n:
+                break
+        return picks
+
+    def find_similar(self, fact_key, buckets, ontology=None):
+        """
+        Bank questions of `ontology` (or of every ontology) sharing the fact key or an LSH
+        bucket with a new question (candidates for MCQ_Dedup; the caller checks signature
+        similarity).
+        """
+        where, args = ("", ()) if ontology is None else (" AND q.ontology = ?", (ontology,))
+        ids = {qid for (qid,) in self.conn.execute(
+            f"""SELECT f.question_id FROM fingerprints f JOIN questions q ON q.id = f.question_id
+                WHERE f.fact_key = ?{where}""", (fact_key,) + args)}
+        for b in buckets:
+            # same fan-out cap as the in-memory index
+            ids.update(qid for (qid,) in self.conn.execute(
+                f"""SELECT l.question_id FROM lsh_buckets l JOIN questions q ON q.id = l.question_id
+                    WHERE l.bucket = ?{where} LIMIT ?""", (b,) + args + (MAX_BUCKET_SIZE,)))
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"""SELECT q.id, q.question, q.correct_answer, f.fact_key, f.signature
+                FROM fingerprints f JOIN questions q ON q.id = f.question_id
+                WHERE f.question_id IN ({marks})""", list(ids))
+        return [{"id": qid, "question": q, "correct_answer": a, "fact_key": key,
+                 "signature": np.frombuffer(sig, dtype="<u4", count=NUM_PERM)}
+                for qid, q, a, key, sig in rows]
+
+    def fetch(self, ids):
+        """Full questions (with distractors) for the given ids, in the same order."""
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        rows = {r[0]: {"id": r[0], "ontology": r[1], "family": r[2], "question": r[3],
+                       "correct_answer": r[4], "subject_id": r[5], "answer_id": r[6], "distractors": []}
+                for r in self.conn.execute(
+                    f"SELECT id, ontology, family, question, correct_answer, subject_id, answer_id "
+                    f"FROM questions WHERE id IN ({marks})", ids)}
+        for qid, text in self.conn.execute(
+                f"SELECT question_id, text FROM options WHERE question_id IN ({marks}) ORDER BY question_id, position", ids):
+            rows[qid]["distractors"].append(text)
+        return [rows[i] for i in ids if i in rows]
+
+    def sample(self, n, family=None, ontology=None, exclude_entities=(), seed=None):
+        """n random questions of one family (or any family), skipping excluded entity IRIs."""
+        rng = random.Random(seed)
+        ids = self._pick(self._candidates(family, ontology), n, set(exclude_entities), rng)
+        return self.fetch(ids)
+
+    def assemble_quiz(self, n, families=None, ontology=None, exclude_entities=(), seed=None):
+        """
+        n random questions spread as evenly as possible over the given families
+        (default: every family in the bank). No entity is asked about twice in one quiz.
+        """
+        rng = random.Random(seed)
+        exclude = set(exclude_entities)
+        families = list(families or sorted(self.families(ontology)))
+        pools = {fam: self._candidates(fam, ontology) for fam in families}
+        order = {fam: random_order(len(pools[fam]), rng) for fam in families}
+        picks = []
+        # Round-robin over families until n questions are found or every family is exhausted
+        active = [fam for fam in families if pools[fam]]
+        rng.shuffle(active)
+        while len(picks) < n and active:
+            for fam in list(active):
+                if len(picks) >= n:
+                    break
+                for i in order[fam]:
+                    qid, subj, ans = pools[fam][i]
+                    if subj in exclude or ans in exclude:
+                        continue
+                    picks.append(qid)
+                    exclude.update(e for e in (subj, ans) if e)
+                    break
+                else:
+                    active.remove(fam)
+        return self.fetch(picks)
+
+def bench(bank, n=10, iterations=2000, seed=0):
+    """Quiz assemblies per second against an existing bank."""
+    start = time.time()
+    for i in range(iterations):
+        bank.assemble_quiz(n, seed=seed + i)
+    elapsed = time.time() - start
+    print(f"{iterations} quizzes of {n} in {elapsed:.2f}s -> {iterations / elapsed:.0f} quizzes/s "
+          f"({bank.count()} questions in bank)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexed MCQ question bank.")
+    parser.add_argument("--db", default="question_bank.sqlite", help="SQLite bank file")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_in = sub.add_parser("ingest", help="upsert a generated_mcqs.csv into the bank")
+    p_in.add_argument("csv")
+    p_in.add_argument("--ontology", default=None, help="ontology name (default: CSV folder name)")
+
+    p_quiz = sub.add_parser("quiz", help="print a random quiz")
+    p_quiz.add_argument("--n", type=int, default=10)
+    p_quiz.add_argument("--family", action="append", help="restrict to family (repeatable)")
+    p_quiz.add_argument("--ontology", default=None)
+    p_quiz.add_argument("--exclude", action="append", default=[], help="entity IRI already asked")
+    p_quiz.add_argument("--seed", type=int, default=None)
+
+    p_bench = sub.add_parser("bench", help="measure quiz assembly throughput")
+    p_bench.add_argument("--n", type=int, default=10)
+    p_bench.add_argument("--iterations", type=int, default=2000)
+
+    for p in (p_in, p_quiz, p_bench):
+        p.add_argument("--db", default=argparse.SUPPRESS, help="SQLite bank file")
+    args = parser.parse_args(argv)
+    bank = QuestionBank(args.db)
+
+    if args.cmd == "ingest":
+        ontology = args.ontology or os.path.basename(os.path.dirname(os.path.abspath(args.csv)))
+        n = bank.upsert_mcqs(read_mcq_csv(args.csv), ontology)
+        print(f"Upserted {n} MCQs for '{ontology}' into {args.db}: {bank.families(ontology)}")
+    elif args.cmd == "quiz":
+        quiz = bank.assemble_quiz(args.n, args.family, args.ontology, args.exclude, args.seed)
+        for i, q in enumerate(quiz, 1):
+            print(f"Q{i}. [{q['family']}] {q['question']}")
+            print(f"   Answer: {q['correct_answer']} | Distractors: {', '.join(q['distractors'])}")
+    else:
+        bench(bank, args.n, args.iterations)
+    bank.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
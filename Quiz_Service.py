@@ -0,0 +1,261 @@
+# @title Quiz Service Creation
+#%%writefile Quiz_Service.py
+'''
+Local asyncio quiz service over a warm generator.
+The cached artifacts of `mcqgen extract` (entity table, distractor index, hierarchy and
+relation frames) are loaded once. Each family's MCQ pool is generated at most once,
+off the event loop, and every request then draws from memory:
+
+  - coalescing: concurrent requests for a family join one pending list, served by a
+    single dispatch (one pool lookup or generation, one draw pass for all of them)
+  - seeds: a request with a seed always gets the same questions and option order
+    (random.Random(family, seed)); unseeded requests take the next questions of the
+    family's buffer
+  - buffers: a pre-shuffled buffer per family, topped up in the background whenever it
+    falls below half of buffer_size
+
+A reply never repeats a question, so n is capped at the size of the family's pool.
+
+Protocol: one JSON object per line over TCP, e.g. {"family": "role", "n": 5, "seed": 7}
+answered by {"family": ..., "seed": ..., "mcqs": [{"question", "options", "answer", ...}]}
+or {"error": ...}. Run it with `python mcqgen.py serve <artifact folder>`.
+'''
+
+import json, time, random, asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import MCQ_Core as core
+from MCQ_Dedup import dedup_rows
+
+DEFAULT_PORT = 8765
+LINE_LIMIT = 1 << 20     # longest request line (bytes)
+BUFFER_SIZE = 256        # questions pre-drawn per family for unseeded requests
+MAX_QUESTIONS = 50       # per request
+
+def prepare(row):
+    """MCQ row -> (question, options with the correct one last, source_template, subject_id, relation)."""
+    correct = str(row[1]).strip()
+    options = core.sanitize_distractors(json.loads(row[7]), correct)[:3]
+    return (row[0], tuple(options) + (correct,), row[3], row[4], row[6])
+
+def quiz_item(entry, rng):
+    """One prepared MCQ as served: options in rng order, `answer` is the index of the correct one."""
+    options = list(entry[1])
+    order = list(range(len(options)))
+    rng.shuffle(order)
+    return {"question": entry[0], "options": [options[i] for i in order], "answer": order.index(len(options) - 1),
+            "source_template": entry[2], "subject_id": entry[3], "relation": entry[4]}
+
+class QuizService:
+    """
+    Serves MCQs per FAMILY_GENERATORS key from pools generated on demand (call
+    MCQ_Core setup first, e.g. mcqgen.load_artifacts, and pass the frames).
+    """
+    def __init__(self, frames, buffer_size=BUFFER_SIZE):
+        self.frames = frames
+        self.buffer_size = buffer_size
+        self.pools = {}        # family -> prepared, deduplicated MCQs
+        self.buffers = {}      # family -> deque of pre-drawn (pool index, quiz item)
+        self._pool_tasks = {}  # family -> task generating its pool (one per family)
+        self._waiting = {}     # family -> [(n, seed, future)] for the next dispatch
+        self._refills = {}     # family -> background refill task
+        self._draws = {}       # family -> number of buffer refills so far
+        self._warm_task = None
+        self.stats = {"requests": 0, "dispatches": 0, "generated": 0}
+        # MCQ_Core keeps module state (random stream, similarity cache): one generator thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcq-generator")
+
+    # Pools
+    def _generate(self, family):
+        rows, _ = dedup_rows(core.generate_family(family, self.frames), core.MCQ_COLUMNS)
+        return [prepare(r) for r in rows]
+
+    async def pool(self, family):
+        """The family's prepared MCQs; concurrent callers share one generation."""
+        if family in self.pools:
+            return self.pools[family]
+        task = self._pool_tasks.get(family)
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = self._pool_tasks[family] = loop.run_in_executor(self._executor, self._generate, family)
+        try:
+            rows = await task
+        finally:
+            # Done either way: a failed generation is retried by the next request
+            if self._pool_tasks.get(family) is task:
+                del self._pool_tasks[family]
+        if family not in self.pools:
+            self.pools[family] = rows
+            self.stats["generated"] += 1
+            self.buffers[family] = deque()
+            self._fill(family)
+        return rows
+
+    async def warm(self, families=None):
+        """Generates every family's pool and buffer in the background (call once at startup)."""
+        for family in families or core.FAMILY_GENERATORS:
+            await self.pool(family)
+
+    # Buffers
+    def _fill(self, family, size=0):
+        """Appends shuffled passes over the pool until the buffer holds max(size, buffer_size) items."""
+        pool, buf = self.pools[family], self.buffers[family]
+        while pool and len(buf) < max(size, self.buffer_size):
+            self._draws[family] = self._draws.get(family, 0) + 1
+            rng = random.Random(f"{family}\x1fbuffer\x1f{self._draws[family]}")
+            buf.extend((i, quiz_item(pool[i], rng)) for i in rng.sample(range(len(pool)), len(pool)))
+
+    async def _refill(self, family):
+        await asyncio.sleep(0)
+        self._fill(family)
+        self._refills.pop(family, None)
+
+    def _take(self, family, n):
+        """The next n distinct questions of the buffer; repeats are left at its front for later requests."""
+        buf = self.buffers[family]
+        items, seen, skipped = [], set(), []
+        # Every pass holds each pool index once, so n <= len(pool) ends within two passes
+        while len(items) < min(n, len(self.pools[family])):
+            if not buf:
+                self._fill(family, 1)
+            i, item = buf.popleft()
+            if i in seen:
+                skipped.append((i, item))
+            else:
+                seen.add(i)
+                items.append(item)
+        buf.extendleft(reversed(skipped))
+        if len(buf) < self.buffer_size // 2 and family not in self._refills:
+            self._refills[family] = asyncio.ensure_future(self._refill(family))
+        return items
+
+    # Requests
+    def draw(self, family, requests):
+        """Quiz items for a batch of (n, seed) requests of one family, in request order."""
+        pool = self.pools[family]
+        out = []
+        for n, seed in requests:
+            if seed is None:
+                out.append(self._take(family, n))
+            else:
+                rng = random.Random(f"{family}\x1f{seed}")
+                out.append([quiz_item(pool[i], rng) for i in rng.sample(range(len(pool)), min(n, len(pool)))])
+        return out
+
+    async def request(self, family, n=5, seed=None):
+        """n quiz items of a family; requests arriving together are served by one dispatch."""
+        if family not in core.FAMILY_GENERATORS:
+            raise KeyError(f"unknown family {family!r}; choose from {list(core.FAMILY_GENERATORS)}")
+        n = max(1, min(int(n), MAX_QUESTIONS))
+        self.stats["requests"] += 1
+        fut = asyncio.get_running_loop().create_future()
+        waiting = self._waiting.setdefault(family, [])
+        waiting.append((n, seed, fut))
+        if len(waiting) == 1:
+            asyncio.ensure_future(self._dispatch(family))
+        return await fut
+
+    async def _dispatch(self, family):
+        # Yield once so that every request of this loop iteration joins the batch
+        await asyncio.sleep(0)
+        try:
+            await self.pool(family)
+        except Exception as e:
+            batch, self._waiting[family] = self._waiting[family], []
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        batch, self._waiting[family] = self._waiting[family], []
+        self.stats["dispatches"] += 1
+        for (_, _, fut), items in zip(batch, self.draw(family, [(n, seed) for n, seed, _ in batch])):
+            if not fut.done():
+                fut.set_result(items)
+
+    # TCP front end (JSON lines)
+    @staticmethod
+    def error_message(e):
+        # str() of a KeyError is the repr of its argument: reply with the message itself
+        if isinstance(e, KeyError) and len(e.args) == 1:
+            return str(e.args[0])
+        if isinstance(e, (ValueError, TypeError)):
+            return str(e)
+        return f"{type(e).__name__}: {e}"
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # Longer than the stream limit: the rest of the line cannot be framed, so close
+                    writer.write(b'{"error": "request line too long"}\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict) or "family" not in req:
+                        raise ValueError('a request is a JSON object with a "family"')
+                    items = await self.request(req["family"], req.get("n", 5), req.get("seed"))
+                    reply = {"family": req["family"], "seed": req.get("seed"), "mcqs": items}
+                except Exception as e:
+                    # Any failure (bad request or failed generation) is answered, never dropped
+                    reply = {"error": self.error_message(e)}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, warm=True):
+        """Starts the TCP server (and the background warm-up); returns the asyncio server."""
+        server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT, backlog=1024)
+        if warm:
+            self._warm_task = asyncio.ensure_future(self.warm())
+        return server
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+# Load test
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+async def load_test(host, port, families, clients=200, requests=20, n=5, seeded=0.5, interval=0.0):
+    """
+    `clients` concurrent connections, each sending `requests` requests one after another
+    for random families (a share `seeded` of them with a seed), waiting a random think
+    time of mean `interval` seconds before each one (0: back to back). Returns latencies in ms.
+    """
+    latencies = []
+
+    async def client(c):
+        rng = random.Random(c)
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        try:
+            for _ in range(requests):
+                if interval:
+                    await asyncio.sleep(rng.expovariate(1 / interval))
+                req = {"family": rng.choice(families), "n": n}
+                if rng.random() < seeded:
+                    req["seed"] = rng.randrange(1000)
+                t0 = time.perf_counter()
+                writer.write(json.dumps(req).encode("utf-8") + b"\n")
+                reply = json.loads(await reader.readline())
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if "error" in reply:
+                    raise RuntimeError(reply["error"])
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    return latencies
+
+def latency_report(latencies, seconds):
+    s = sorted(latencies)
+    return (f"{len(s)} requests in {seconds:.2f}s ({len(s) / seconds:.0f}/s): "
+            f"p50 {percentile(s, 0.50):.2f} ms, p90 {percentile(s, 0.90):.2f} ms, "
+            f"p99 {percentile(s, 0.99):.2f} ms, max {s[-1]:.2f} ms")
\ No newline at end of file
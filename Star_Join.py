@@ -0,0 +1,93 @@
+# @title Star Join Creation
+#%%writefile Star_Join.py
+'''
+Star-join engine for composite (multi-relation) question patterns.
+A pattern joins several properties around one center entity, e.g. a movie with its
+director and an actor. Each role is bound by property keywords (as PartB picks the
+director/actor/date properties), indexed as subject -> [(property, value)] over the
+full graph, and joined on the shared subject: the cost is linear in the indexed
+triples plus the joined rows. Limits and seeded sampling are applied after the join.
+
+Patterns live in composite_patterns.json (written by PartB_Template_generator.py):
+    "director_actor_chain": {
+        "family": "Director-Actor Chain",        # source_template of the MCQs
+        "center": "movie",                       # name of the shared subject
+        "roles": {"director": {"properties": ["director"]},
+                  "actor": {"properties": ["actor", "starring"]}},
+        "answer": "actor",                       # role asked for
+        "limit": 60                              # sampled rows kept after the join
+    }
+The pattern name is also its question_templates.json key. A role with
+"kind": "data" binds datatype properties (literal values) instead of object properties.
+'''
+
+import json, itertools
+import pandas as pd
+from Utility_Files import ReservoirSampler
+
+def load_patterns(path="composite_patterns.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def is_data_role(role):
+    return role.get("kind") == "data"
+
+def role_properties(role, obj_props, data_props):
+    """Properties a role binds: those whose IRI contains one of its keywords."""
+    props = data_props if is_data_role(role) else obj_props
+    return sorted((p for p in props if any(kw in str(p).lower() for kw in role["properties"])), key=str)
+
+def pattern_columns(pattern):
+    """Frame columns: the center, then <role>_property and <role> for every role."""
+    cols = [pattern["center"]]
+    for role in pattern["roles"]:
+        cols += [f"{role}_property", role]
+    return cols
+
+def star_join(role_indexes):
+    """
+    Joins per-role indexes {subject: [(property, value), ...]} on their subject.
+    Yields (center, property1, value1, property2, value2, ...) in role order.
+    """
+    if not role_indexes or not all(role_indexes):
+        return
+    # Drive the join from the role with the fewest subjects
+    smallest = min(role_indexes, key=len)
+    for center in smallest:
+        bindings = [idx.get(center) for idx in role_indexes]
+        if not all(bindings):
+            continue
+        for combo in itertools.product(*bindings):
+            yield (center,) + tuple(x for pv in combo for x in pv)
+
+def evaluate_pattern(name, pattern, pairs, obj_props, data_props, seed=42):
+    """
+    Evaluates one pattern over the graph. pairs(prop, is_data) yields the (subject, value)
+    pairs of one property. Returns (sampled rows, number of joined rows).
+    """
+    role_indexes = []
+    for role in pattern["roles"].values():
+        idx = {}
+        for p in role_properties(role, obj_props, data_props):
+            for s, v in pairs(p, is_data_role(role)):
+                idx.setdefault(s, []).append((p, v))
+        role_indexes.append(idx)
+
+    sampler = ReservoirSampler(pattern.get("limit", 100), seed, name)
+    for row in star_join(role_indexes):
+        sampler.add(row)
+    return sampler.rows(), sampler.seen
+
+def pattern_frame(pattern, rows, label):
+    """DataFrame of a pattern's rows, with <col>_label columns for the center and object roles."""
+    df = pd.DataFrame(rows, columns=pattern_columns(pattern))
+    df[f"{pattern['center']}_label"] = [label(x) for x in df[pattern["center"]]]
+    for name, role in pattern["roles"].items():
+        if is_data_role(role):
+            df[name] = df[name].astype(str)
+        else:
+            df[f"{name}_label"] = [label(x) for x in df[name]]
+    return df
+
+def composite_file(name):
+    return f"composite_{name}.csv"
\ No newline at end of file
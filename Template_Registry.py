@@ -0,0 +1,114 @@
+# @title Template Registry Creation
+#%%writefile Template_Registry.py
+'''
+Compiled question templates.
+Every template of question_templates.json is parsed once into its slot list and a
+positional format string, and checked against the slots its family provides (the
+answer is never one of them), so a bad template fails when the templates are loaded
+instead of halfway through generation. Rendering groups a family's rows by variant
+and formats each group in one pass.
+'''
+
+import json, zlib, string
+from operator import itemgetter
+
+class TemplateError(ValueError):
+    """Invalid question template (unknown slot, bad syntax, missing family)."""
+
+class CompiledTemplate:
+    """One template: `slots` in order of appearance and a positional format string."""
+    def __init__(self, text):
+        self.text = text
+        self.slots = []
+        pieces = []
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise TemplateError(f"{text!r}: {e}") from None
+        for literal, field, spec, conversion in parsed:
+            pieces.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise TemplateError(f"{text!r}: slot '{{{field}}}' must be a plain name")
+            if field not in self.slots:
+                self.slots.append(field)
+            pieces.append("{%d%s%s}" % (self.slots.index(field),
+                                        f"!{conversion}" if conversion else "",
+                                        f":{spec}" if spec else ""))
+        self._format = "".join(pieces).format
+        self._get = itemgetter(*self.slots) if len(self.slots) > 1 else None
+
+    def render(self, values):
+        return self.render_batch([values])[0]
+
+    def render_batch(self, values_list):
+        fmt = self._format
+        if self._get is not None:
+            get = self._get
+            return [fmt(*get(v)) for v in values_list]
+        if self.slots:
+            slot = self.slots[0]
+            return [fmt(v[slot]) for v in values_list]
+        return [fmt()] * len(values_list)
+
+class TemplateRegistry:
+    """
+    Compiled templates per family key, validated against `fields`
+    ({key: slots the family provides}). Keys without declared fields are compiled
+    (syntax-checked) but not slot-checked; every declared family needs a template.
+    """
+    def __init__(self, templates, fields, seed=42):
+        self.seed = seed
+        self.variants = {}
+        errors = []
+        for key, texts in templates.items():
+            compiled = []
+            for text in texts:
+                try:
+                    t = CompiledTemplate(text)
+                except TemplateError as e:
+                    errors.append(f"{key}: {e}")
+                    continue
+                unknown = [s for s in t.slots if key in fields and s not in fields[key]]
+                if unknown:
+                    errors.append(f"{key}: {text!r} uses {unknown}, available slots are {sorted(fields[key])}")
+                compiled.append(t)
+            self.variants[key] = compiled
+        for key in fields:
+            if not self.variants.get(key):
+                errors.append(f"{key}: no question templates")
+        if errors:
+            raise TemplateError("Invalid question templates:\n  " + "\n  ".join(errors))
+
+    def choices(self, key, ids_list):
+        """
+        Variant index per row: a seeded CRC-32 of the row's ids, so the choice is the
+        same in every run and process whatever order the rows come in.
+        """
+        n = len(self.variants[key])
+        base = zlib.crc32(f"{self.seed}\x1f{key}".encode("utf-8"))
+        return [zlib.crc32("\x1f".join(map(str, ids)).encode("utf-8"), base) % n for ids in ids_list]
+
+    def render(self, key, values_list, ids_list):
+        """Question texts for a batch of rows: slot values and the ids choosing each row's variant."""
+        variants = self.variants[key]
+        if len(variants) == 1:
+            return variants[0].render_batch(values_list)
+        groups = {}
+        for n, v in enumerate(self.choices(key, ids_list)):
+            groups.setdefault(v, []).append(n)
+        out = [None] * len(values_list)
+        for v, idx in groups.items():
+            for n, text in zip(idx, variants[v].render_batch([values_list[n] for n in idx])):
+                out[n] = text
+        return out
+
+_cache = {}   # json of (templates, fields, seed) -> TemplateRegistry
+
+def compile_registry(templates, fields, seed=42):
+    """TemplateRegistry for the given templates, compiled once per process for the same content."""
+    key = json.dumps([templates, {k: sorted(v) for k, v in fields.items()}, seed], sort_keys=True)
+    if key not in _cache:
+        _cache[key] = TemplateRegistry(templates, fields, seed)
+    return _cache[key]
\ No newline at end of file
@@ -1,26 +1,31 @@
 # @title Utility File Creation
 #%%writefile Utility_Files.py
-# Below are the core imports
-from owlready2 import get_ontology, sync_reasoner
-from rdflib import Graph, Namespace, RDF, RDFS, OWL
+# Below are the core imports (owlready2 is imported by load_ontology() only, so that
+# the stages and the mcqgen CLI do not pay for it)
 import urllib.parse
-import pandas as pd
 import os
+import gc
+import hashlib
+import heapq
+import contextlib
 
-# 4 helper functions below
+# helper functions below
 # Ontology Loader
 def load_ontology(path: str, use_reasoner: bool = False):
     """
     Loads ontology and optionally performs reasoning.
     Returns (ontology_object, owl_file_path).
     """
-    onto = get_ontology(path).load()
+    # A private World (instead of owlready2's default one) can be released on its own
+    from owlready2 import World, sync_reasoner
+    world = World()
+    onto = world.get_ontology(path).load()
     print(f"Ontology loaded successfully: {path}")
 
     if use_reasoner:
         print("Running HermiT reasoner (this may take a while)...")
         with onto:
-            sync_reasoner()
+            sync_reasoner(world)
         onto.save(file="reasoned.owl", format="rdfxml")
         print("Reasoning complete. Saved as 'reasoned.owl'.")
         return onto, "reasoned.owl"
@@ -61,4 +66,178 @@ def summarize_ontology(onto):
         ops = list(onto.object_properties())
         print(f"Classes: {len(cls)}, Individuals: {len(inds)}, ObjectProperties: {len(ops)}")
     except Exception:
-        print("Could not summarize ontology (check ontology object type).")
\ No newline at end of file
+        print("Could not summarize ontology (check ontology object type).")
+
+def release_ontology(onto):
+    """Closes the owlready2 World holding the ontology (its quadstore is freed)."""
+    try:
+        onto.world.close()
+    except Exception:
+        pass
+    gc.collect()
+
+# Memory Budget
+def memory_budget_mb(session=None):
+    """
+    Memory budget of the pipeline in MB: MEMORY_BUDGET_MB in the session (runners set it),
+    else the MCQ_MEMORY_BUDGET_MB environment variable. None means unbounded.
+    With a budget, stages release what later stages do not need (bounded-memory mode);
+    the runners also switch files whose estimated peak exceeds it to streaming or
+    partitioned extraction.
+    """
+    value = (session or {}).get("MEMORY_BUDGET_MB") or os.environ.get("MCQ_MEMORY_BUDGET_MB")
+    return float(value) if value else None
+
+def _status_kb(field):
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def rss_mb():
+    """Current resident set size of this process in MB."""
+    kb = _status_kb("VmRSS")
+    return kb / 1024 if kb is not None else peak_rss_mb()
+
+def reset_peak_rss():
+    """Resets the kernel's peak RSS counter (Linux); False where that is not supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Peak RSS in MB since the last reset_peak_rss() (since process start without one)."""
+    kb = _status_kb("VmHWM")
+    if kb is None:
+        import resource, sys
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            kb //= 1024
+    return kb / 1024
+
+def children_peak_mb():
+    """Largest peak RSS in MB of the child processes this process has waited for (0 if none)."""
+    import resource, sys
+    kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        kb //= 1024
+    return kb / 1024
+
+# Peak RSS of Parts A–C over an RDF/XML file: a fixed base plus a multiple of the file size
+# (cinema.owl, 35 MB: about 630 MB unbounded, 540 MB in bounded-memory mode). Streaming the
+# triples without a graph (PartD_Pipelined_runner.py) needs about a third of that (285 MB).
+BASE_PEAK_MB = 100
+PEAK_MB_PER_FILE_MB = 16
+STREAMING_PEAK_MB_PER_FILE_MB = 6
+
+def estimate_peak_mb(path, streaming=False):
+    """Expected peak RSS in MB of one pipeline run over an ontology file (BASE_PEAK_MB if it cannot be read)."""
+    per_mb = STREAMING_PEAK_MB_PER_FILE_MB if streaming else PEAK_MB_PER_FILE_MB
+    try:
+        return BASE_PEAK_MB + os.path.getsize(path) / 2**20 * per_mb
+    except OSError:
+        return BASE_PEAK_MB
+
+class MemoryReport:
+    """Peak RSS of each pipeline stage, checked against the memory budget."""
+    def __init__(self, budget_mb=None):
+        self.budget_mb = budget_mb
+        self.peaks = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        reset_peak_rss()
+        try:
+            yield
+        finally:
+            self.peaks[name] = round(peak_rss_mb(), 1)
+
+    def over_budget(self):
+        return [s for s, mb in self.peaks.items() if self.budget_mb and mb > self.budget_mb]
+
+    def lines(self):
+        out = []
+        for s, mb in self.peaks.items():
+            line = f"  {s:<32}{mb:8.1f} MB peak"
+            if self.budget_mb:
+                line += f" ({mb / self.budget_mb:.0%} of {self.budget_mb:g} MB)"
+                if mb > self.budget_mb:
+                    line += "  OVER BUDGET"
+            out.append(line)
+        return out
+
+# Stage Runner
+def run_stage(script: str, session: dict):
+    """
+    Executes one pipeline script inside the given globals dict,
+    the same way a notebook cell shares globals with the cells after it.
+    """
+    with open(script, "r", encoding="utf-8") as f:
+        code = compile(f.read(), script, "exec")
+    exec(code, session)
+    return session
+
+# Seeded Sampling
+def stable_hash(*parts) -> int:
+    """64-bit hash of the parts' string forms; identical across runs and processes."""
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return int.from_bytes(h.digest(), "big")
+
+def shard_of(subject, shards: int) -> int:
+    """Shard (0..shards-1) that owns a subject IRI in sharded runs."""
+    return stable_hash("shard", subject) % shards
+
+class ReservoirSampler:
+    """
+    Seeded streaming sample of at most `limit` rows.
+    Every row gets a priority stable_hash(seed, name, *row) and the lowest priorities are
+    kept, so the sample does not depend on the order rows arrive in and memory stays at
+    `limit` rows per stratum. With strata, the rows are spread as evenly as the strata
+    allow (round-robin by rank inside each stratum).
+    rows() returns the sample in priority order, so any prefix is itself a uniform sample.
+    """
+    def __init__(self, limit: int, seed: int = 42, name: str = ""):
+        self.limit = limit
+        self.seed = seed
+        self.name = name
+        self.seen = 0
+        self._heaps = {}      # stratum -> max-heap of (-priority, n, row)
+        self._n = 0
+
+    def add(self, row, stratum=None):
+        self.seen += 1
+        if self.limit <= 0:
+            return
+        priority = stable_hash(self.seed, self.name, *row)
+        heap = self._heaps.setdefault(stratum, [])
+        self._n += 1
+        if len(heap) < self.limit:
+            heapq.heappush(heap, (-priority, self._n, row))
+        elif priority < -heap[0][0]:
+            heapq.heapreplace(heap, (-priority, self._n, row))
+
+    def entries(self):
+        """
+        Every kept (stratum, row), ranked as in rows() but not cut to `limit`. Adding the
+        entries of several samplers (e.g. one per shard) to a fresh sampler with the same
+        seed and name gives the sample of a single sampler over all their rows.
+        """
+        ranked = []
+        for stratum, heap in self._heaps.items():
+            for rank, (neg_pr, n, row) in enumerate(sorted(heap, reverse=True)):
+                ranked.append((rank, -neg_pr, n, stratum, row))
+        ranked.sort(key=lambda r: r[:3])
+        return [(r[3], r[4]) for r in ranked]
+
+    def rows(self):
+        return [row for _, row in self.entries()[:self.limit]]
\ No newline at end of file
@@ -0,0 +1,318 @@
+# @title mcqgen - Command Line Entry Point
+'''
+Command-line entry point for the pipeline outside Colab (no Drive, no notebook cells):
+
+    python mcqgen.py extract cinema.owl --out Output/cinema
+    python mcqgen.py generate Output/cinema [--families role actor] [--templates my_templates.json]
+    python mcqgen.py bench Output/cinema --runs 5
+    python mcqgen.py serve Output/cinema --port 8765
+    python mcqgen.py bench Output/cinema --clients 200
+
+`extract` parses the ontology once, writes the relation CSVs of PartB_Relation_extractor.py
+and caches what generation needs from the graph: the label maps as an interned entity table
+(entities.bin) and the distractor index (distractor_index.bin), both memory-mapped by every reader,
+described by mcqgen_cache.json. It is skipped when
+the cache is still valid for the ontology file and the composite patterns; the folder's copy
+of the templates (which extraction does not depend on) is refreshed either way.
+`generate` only reads those artifacts, so it never imports rdflib or owlready2 and does not
+parse the graph; the output equals PartC_MCQ_generator.py's for the same artifacts.
+`bench` times cold `generate` runs in fresh interpreters, plus one run stage by stage;
+with --clients it load-tests the quiz service instead.
+`serve` keeps the artifacts loaded and answers quiz requests over TCP (see Quiz_Service.py).
+Every command reports its peak RSS (per stage for `extract`), against --memory-budget if given.
+`extract` needs the whole graph, so the budget only releases memory between stages there;
+for a file whose estimated peak exceeds it, extract with PartD_Sharded_runner.py instead.
+Heavy modules are imported inside the subcommand that needs them.
+'''
+
+import os, gc, sys, json, time, argparse
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = "mcqgen_cache.json"
+TABLE_FILE = "entities.bin"
+INDEX_FILE = "distractor_index.bin"
+
+def file_stamp(path):
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def read_cache(out_dir):
+    path = os.path.join(out_dir, CACHE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def cache_is_fresh(cache, owl_path, patterns):
+    """True when the cached artifacts were extracted from this file with these composite patterns."""
+    return bool(cache) and cache["ontology"] == file_stamp(owl_path) and cache["composite_patterns"] == patterns
+
+# extract
+def extract(owl_path, out_dir, templates_path="question_templates.json", force=False, budget_mb=None):
+    """
+    Runs PartB (graph + relation CSVs) and caches the label maps and distractor index.
+    The graph is dropped before the index is built.
+    """
+    import MCQ_Core as core
+    from Entity_Table import EntityTable
+    from Utility_Files import run_stage, ensure_dir, estimate_peak_mb, MemoryReport
+    from PartD_Batch_runner import load_templates
+
+    ensure_dir(out_dir)
+    templates, patterns = load_templates(templates_path, out_dir)
+    # Generation reads templates and patterns from the artifact folder
+    for name, data in (("question_templates.json", templates), ("composite_patterns.json", patterns)):
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    cache = read_cache(out_dir)
+    artifacts = [os.path.join(out_dir, f) for f in (TABLE_FILE, INDEX_FILE)]
+    if not force and cache_is_fresh(cache, owl_path, patterns) and all(map(os.path.exists, artifacts)):
+        print(f"Artifacts in {out_dir} are up to date (use --force to extract again); templates refreshed")
+        return cache
+
+    if budget_mb and estimate_peak_mb(owl_path) > budget_mb:
+        print(f"Warning: extracting {owl_path} needs about {estimate_peak_mb(owl_path):.0f} MB, over the "
+              f"{budget_mb:g} MB budget; PartD_Sharded_runner.py partitions the file to stay within it")
+    seconds, memory = {}, MemoryReport(budget_mb)
+    t0 = time.time()
+    session = {"__name__": "__main__", "owl_file": os.path.abspath(owl_path), "COMPOSITE_PATTERNS": patterns,
+               "MEMORY_BUDGET_MB": budget_mb}
+    prev_cwd = os.getcwd()
+    try:
+        os.chdir(out_dir)
+        for stage in ("PartB_Rdf_graph_builder.py", "PartB_Relation_extractor.py"):
+            with memory.stage(stage):
+                run_stage(os.path.join(REPO_DIR, stage), session)
+            seconds[stage] = round(time.time() - t0, 2)
+            t0 = time.time()
+    finally:
+        os.chdir(prev_cwd)
+
+    with memory.stage("artifacts"):
+        g, found_label = session.pop("g"), session["found_label"]
+        triples = len(g)
+        core.build_label_maps(g, found_label)
+        EntityTable.from_maps(core.uri_to_label, core.frag_to_label).save(artifacts[0])
+        types = core.entity_types(g)
+        del g, session
+        gc.collect()
+        core.build_distractor_index(types).save(artifacts[1])
+    seconds["artifacts"] = round(time.time() - t0, 2)
+
+    cache = {"ontology": file_stamp(owl_path), "found_label": str(found_label),
+             "composite_patterns": patterns, "triples": triples, "seconds": seconds,
+             "peak_mb": memory.peaks}
+    with open(os.path.join(out_dir, CACHE_FILE), "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    print(f"Extracted {triples} triples into {out_dir}: {seconds}")
+    print("\n".join(["Peak RSS per stage:"] + memory.lines()))
+    return cache
+
+# generate
+def load_artifacts(out_dir, templates_path=None):
+    """
+    Sets up MCQ_Core from the cached artifacts of `extract` (patterns, templates, entity
+    table, distractor index, hierarchy) and returns the relation frames.
+    """
+    import MCQ_Core as core
+    from Entity_Table import EntityTable
+    from Distractor_Index import DistractorIndex
+    cache = read_cache(out_dir)
+    if cache is None:
+        raise SystemExit(f"No cached artifacts in {out_dir}: run `mcqgen extract` first")
+    src = cache["ontology"]
+    if os.path.exists(src["path"]) and file_stamp(src["path"]) != src:
+        raise SystemExit(f"{src['path']} changed since it was extracted: run `mcqgen extract` again")
+    missing = [f for f in (TABLE_FILE, INDEX_FILE) if not os.path.exists(os.path.join(out_dir, f))]
+    if missing:
+        raise SystemExit(f"{missing} missing in {out_dir} (older cache layout): run `mcqgen extract` again")
+    core.set_composite_patterns(cache["composite_patterns"])
+    core.set_templates(core.load_templates(templates_path or os.path.join(out_dir, "question_templates.json")))
+    core.use_entity_table(EntityTable.open(os.path.join(out_dir, TABLE_FILE)))
+    core.distractor_index = DistractorIndex.open(os.path.join(out_dir, INDEX_FILE))
+    frames = core.load_frames(out_dir)
+    core.build_hierarchy(frames["taxonomy"])
+    return frames
+
+def check_families(families):
+    import MCQ_Core as core
+    unknown = [f for f in families if f not in core.FAMILY_GENERATORS]
+    if unknown:
+        raise SystemExit(f"Unknown families {unknown}; choose from {list(core.FAMILY_GENERATORS)}")
+
+def generate(out_dir, families=None, templates_path=None, output=None, bank_path=None, timings=None,
+             budget_mb=None):
+    """
+    Generates MCQs from the cached artifacts of `extract` (all families, or the given
+    FAMILY_GENERATORS keys) and writes them to `output`. Returns the MCQ DataFrame.
+    `timings`, when given, receives the seconds spent per stage.
+    """
+    timings = {} if timings is None else timings
+    t0 = time.time()
+    import MCQ_Core as core
+    from MCQ_Dedup import dedup_rows
+    from Utility_Files import peak_rss_mb
+    timings["imports"] = time.time() - t0
+
+    t0 = time.time()
+    families = families or list(core.FAMILY_GENERATORS)
+    check_families(families)
+    frames = load_artifacts(out_dir, templates_path)
+    timings["load artifacts"] = time.time() - t0
+
+    rows = []
+    for fam in families:
+        t0 = time.time()
+        rows += core.generate_family(fam, frames)
+        timings[f"generate {fam}"] = time.time() - t0
+
+    t0 = time.time()
+    bank, ontology = None, None
+    if bank_path:
+        from Question_Bank import QuestionBank, ontology_name
+        bank = QuestionBank(bank_path)
+        ontology = ontology_name(read_cache(out_dir)["ontology"]["path"])
+    rows, dedup = dedup_rows(rows, core.MCQ_COLUMNS, bank, ontology=ontology)
+    if bank is not None:
+        bank.close()
+    timings["dedup"] = time.time() - t0
+
+    t0 = time.time()
+    if output is None:
+        suffix = "" if families == list(core.FAMILY_GENERATORS) else "_" + "_".join(families)
+        output = os.path.join(out_dir, f"generated_mcqs{suffix}.csv")
+    df_mcq = core.to_mcq_frame(rows)
+    df_mcq.to_csv(output, index=False)
+    timings["write"] = time.time() - t0
+    peak = peak_rss_mb()
+    budget = f" of the {budget_mb:g} MB budget" + (", OVER BUDGET" if peak > budget_mb else "") if budget_mb else ""
+    print(f"Generated {len(df_mcq)} MCQs -> {output} ({dedup.total_removed()} duplicates removed), "
+          f"peak RSS {peak:.0f} MB{budget}")
+    return df_mcq
+
+# bench
+def bench(out_dir, runs=3, families=None):
+    """Cold-start times of `generate` in fresh interpreters, then one in-process run by stage."""
+    import subprocess
+    cmd = [sys.executable, os.path.abspath(__file__), "generate", out_dir, "--output", os.devnull]
+    if families:
+        cmd += ["--families", *families]
+    walls = []
+    for _ in range(runs):
+        t0 = time.time()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        walls.append(time.time() - t0)
+    print(f"Cold generate ({runs} runs): best {min(walls):.3f}s, mean {sum(walls) / len(walls):.3f}s")
+
+    timings = {}
+    generate(out_dir, families, output=os.devnull, timings=timings)
+    for stage, s in timings.items():
+        print(f"  {stage:<22}{s:8.3f}s")
+    return walls, timings
+
+def bench_service(out_dir, clients=200, requests=20, families=None, interval=0.05):
+    """
+    Warms an in-process quiz service, then measures request latency under concurrent
+    clients that pause `interval` seconds on average between requests (0: back to back).
+    """
+    import asyncio
+    import MCQ_Core as core
+    from Quiz_Service import QuizService, load_test, latency_report
+    families = families or list(core.FAMILY_GENERATORS)
+    check_families(families)
+    service = QuizService(load_artifacts(out_dir))
+
+    async def run():
+        server = await service.serve("127.0.0.1", 0, warm=False)
+        port = server.sockets[0].getsockname()[1]
+        t0 = time.time()
+        await service.warm(families)
+        print(f"Warm-up: {len(service.pools)} family pools in {time.time() - t0:.2f}s")
+        t0 = time.time()
+        latencies = await load_test("127.0.0.1", port, families, clients, requests, interval=interval)
+        pace = f"every {interval * 1000:g} ms on average" if interval else "back to back"
+        print(f"{clients} clients, requests {pace}: " + latency_report(latencies, time.time() - t0))
+        print(f"  {service.stats['requests']} requests served by {service.stats['dispatches']} dispatches")
+        server.close()
+        await server.wait_closed()
+        return latencies
+
+    try:
+        return asyncio.run(run())
+    finally:
+        service.close()
+
+# serve
+def serve(out_dir, host="127.0.0.1", port=None, templates_path=None, buffer_size=None):
+    """Runs the quiz service on the cached artifacts until interrupted."""
+    import asyncio
+    from Quiz_Service import QuizService, DEFAULT_PORT, BUFFER_SIZE
+    service = QuizService(load_artifacts(out_dir, templates_path), buffer_size or BUFFER_SIZE)
+
+    async def run():
+        server = await service.serve(host, port or DEFAULT_PORT)
+        print(f"Serving quizzes from {out_dir} on {host}:{port or DEFAULT_PORT} (JSON lines)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mcqgen", description="Ontology-based MCQ generation.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extract", help="parse an ontology and cache its relation CSVs, labels and index")
+    p.add_argument("ontology", help="OWL (RDF/XML) file")
+    p.add_argument("--out", default=".", help="artifact folder")
+    p.add_argument("--templates", default="question_templates.json",
+                   help="question templates (generated if missing); composite_patterns.json is read next to it")
+    p.add_argument("--force", action="store_true", help="extract even if the cached artifacts are up to date")
+    p.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                   help="memory budget (default: $MCQ_MEMORY_BUDGET_MB, unbounded)")
+
+    p = sub.add_parser("generate", help="generate MCQs from cached artifacts")
+    p.add_argument("dir", help="artifact folder written by extract")
+    p.add_argument("--families", nargs="+", default=None, help="only these families (e.g. role actor)")
+    p.add_argument("--templates", default=None, help="question templates (default: the folder's copy)")
+    p.add_argument("--output", default=None, help="CSV to write (default: generated_mcqs.csv in the folder)")
+    p.add_argument("--bank", default=None, help="SQLite question bank to dedup against")
+    p.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                   help="memory budget (default: $MCQ_MEMORY_BUDGET_MB, unbounded)")
+
+    p = sub.add_parser("bench", help="time cold generate runs, or the quiz service with --clients")
+    p.add_argument("dir", help="artifact folder written by extract")
+    p.add_argument("--runs", type=int, default=3, help="fresh-interpreter runs")
+    p.add_argument("--families", nargs="+", default=None, help="only these families")
+    p.add_argument("--clients", type=int, default=None, help="concurrent quiz service clients")
+    p.add_argument("--requests", type=int, default=20, help="requests per client (with --clients)")
+    p.add_argument("--interval", type=float, default=0.05,
+                   help="mean seconds between one client's requests (with --clients; 0: back to back)")
+
+    p = sub.add_parser("serve", help="serve quizzes from cached artifacts over TCP (JSON lines)")
+    p.add_argument("dir", help="artifact folder written by extract")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=None, help="TCP port (default 8765)")
+    p.add_argument("--templates", default=None, help="question templates (default: the folder's copy)")
+    p.add_argument("--buffer", type=int, default=None, help="questions pre-drawn per family (default 256)")
+
+    args = parser.parse_args(argv)
+    budget_mb = getattr(args, "memory_budget", None) or float(os.environ.get("MCQ_MEMORY_BUDGET_MB") or 0) or None
+    if args.command == "extract":
+        extract(args.ontology, args.out, args.templates, args.force, budget_mb)
+    elif args.command == "generate":
+        generate(args.dir, args.families, args.templates, args.output, args.bank, budget_mb=budget_mb)
+    elif args.command == "bench" and args.clients:
+        bench_service(args.dir, args.clients, args.requests, args.families, args.interval)
+    elif args.command == "bench":
+        bench(args.dir, args.runs, args.families)
+    elif args.command == "serve":
+        serve(args.dir, args.host, args.port, args.templates, args.buffer)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,6 @@
+import os, sys
+
+# The pipeline modules are top-level files of the repository root
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
\ No newline at end of file
@@ -0,0 +1,61 @@
+from MCQ_Dedup import Deduplicator, fact_key, question_text, signatures, similarity
+from Question_Bank import QuestionBank
+
+def mcq(question, answer, subject="s", answer_id="", relation="role", family="Role Relation"):
+    return {"question": question, "correct_answer": answer, "subject_id": subject, "answer_id": answer_id,
+            "relation": relation, "source_template": family, "distractors": "x, y, z"}
+
+def test_fact_key_is_symmetric_for_sibling_pairs():
+    a = mcq("Which is a sibling of A?", "B", subject="http://x#A", answer_id="http://x#B", relation="sibling")
+    b = mcq("Which is a sibling of B?", "A", subject="http://x#B", answer_id="http://x#A", relation="sibling")
+    assert fact_key(a) == fact_key(b)
+
+def test_fact_key_keeps_direction_for_other_relations():
+    a = mcq("Who directed A?", "B", subject="http://x#A", answer_id="http://x#B", relation="director")
+    b = mcq("Who directed B?", "A", subject="http://x#B", answer_id="http://x#A", relation="director")
+    assert fact_key(a) != fact_key(b)
+
+def test_fact_key_needs_a_subject():
+    assert fact_key(mcq("Q?", "A", subject="")) is None
+
+def test_same_fact_from_another_family_is_dropped():
+    rows = [mcq("Name an actor from Heat.", "Al Pacino", "m1", "a1", "actor", "Actor Question"),
+            mcq("Which actor starred in Heat, directed by Michael Mann?", "Al Pacino", "m1", "a1", "actor",
+                "Director-Actor Chain")]
+    dd = Deduplicator()
+    assert dd.filter(rows) == rows[:1]
+    assert dd.removed["Director-Actor Chain"]["fact"] == 1
+
+def test_near_identical_text_is_dropped():
+    rows = [mcq("Which company distributed the movie The Shop Around the Corner in the United States?", "MGM", "m1"),
+            mcq("Which company distributed the movie The Shop Around the Corner in the United States ?", "MGM", "m2"),
+            mcq("Who composed the score of Vertigo?", "Bernard Herrmann", "m3")]
+    assert Deduplicator().filter(rows) == [rows[0], rows[2]]
+
+def test_signature_similarity_tracks_text_overlap():
+    sigs = signatures([question_text(mcq("Who directed the movie Heat?", "Michael Mann")),
+                       question_text(mcq("Who directed the movie Heat?", "Michael Mann")),
+                       question_text(mcq("When was Casablanca released?", "1942"))])
+    assert similarity(sigs[0], sigs[1]) == 1.0
+    assert similarity(sigs[0], sigs[2]) < 0.2
+
+def test_bank_dedup_is_per_ontology(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite"))
+    row = mcq("Who directed Heat?", "Michael Mann", "m1", "d1", "director")
+    bank.upsert_mcqs([row], "cinema")
+    other = mcq("Heat was directed by whom?", "Michael Mann", "m1", "d1", "director")
+    assert Deduplicator(bank, ontology="cinema").filter([other]) == []
+    assert Deduplicator(bank, ontology="films").filter([other]) == [other]
+    bank.close()
+
+def test_bank_row_refreshes_itself_but_not_a_duplicate(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite"))
+    row = mcq("Who directed Heat?", "Michael Mann", "m1", "d1", "director")
+    assert Deduplicator(bank, ontology="cinema").filter([row]) == [row]
+    bank.upsert_mcqs([row], "cinema")
+    # The same row again only refreshes it...
+    assert Deduplicator(bank, ontology="cinema").filter([row]) == [row]
+    # ...unless another bank question already covers its fact, whatever the candidate order
+    bank.upsert_mcqs([mcq("Heat was directed by whom?", "Michael Mann", "m1", "d1", "director")], "cinema")
+    assert Deduplicator(bank, ontology="cinema").filter([row]) == []
+    bank.close()
\ No newline at end of file
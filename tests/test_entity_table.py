@@ -0,0 +1,54 @@
+import pickle
+import pytest
+from Entity_Table import EntityTable, StringArena
+
+LABELS = {"http://x/cbo/Publisher": "A publisher", "http://x/vocab/Publisher": "Publisher role",
+          "http://x#Heat": "Heat", "http://x#Pacino": "Al Pacino", "http://x#Café": "Café Society"}
+FRAGMENTS = {"Publisher": "Publisher role", "Heat": "Heat", "Pacino": "Al Pacino", "Café": "Café Society"}
+
+def test_arena_keeps_strings_in_order():
+    arena = StringArena.from_strings(["b", "", "été", "a"])
+    assert list(arena) == ["b", "", "été", "a"]
+    assert len(arena) == 4
+
+def test_saved_table_reads_back_the_same_maps(tmp_path):
+    table = EntityTable.open(EntityTable.from_maps(LABELS, FRAGMENTS).save(str(tmp_path / "entities.bin")))
+    assert dict(table.labels) == LABELS
+    assert dict(table.fragments) == FRAGMENTS
+    assert table.labels.get("http://x#Nobody") is None
+    assert "Heat" in table.fragments and "heat" not in table.fragments
+    # An entity id is its position in IRI order
+    assert table.labels.id_of("http://x#Heat") == sorted(LABELS).index("http://x#Heat")
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"NOTATABLE" + bytes(64))
+    with pytest.raises(ValueError):
+        EntityTable.open(str(path))
+
+def test_mapped_table_pickles_as_its_path(tmp_path):
+    table = EntityTable.open(EntityTable.from_maps(LABELS, FRAGMENTS).save(str(tmp_path / "entities.bin")))
+    data = pickle.dumps(table)
+    assert len(data) < 200
+    copy = pickle.loads(data)
+    assert copy.path == table.path and dict(copy.labels) == LABELS
+
+def test_saved_distractor_index_answers_like_the_built_one(tmp_path):
+    pytest.importorskip("scipy")
+    from Distractor_Index import DistractorIndex
+    entities = {"http://x#Heat": "Heat", "http://x#Ronin": "Ronin", "http://x#Collateral": "Collateral",
+                "http://x#HeatWave": "Heat Wave", "http://x#Mann": "Michael Mann", "http://x#Frankenheimer":
+                "John Frankenheimer", "http://x#Scott": "Tony Scott"}
+    film, person = "http://x#Film", "http://x#Person"
+    types = {iri: {film if iri in ("http://x#Heat", "http://x#Ronin", "http://x#Collateral", "http://x#HeatWave")
+                   else person} for iri in entities}
+    built = DistractorIndex(entities, types)
+    mapped = DistractorIndex.open(built.save(str(tmp_path / "distractor_index.bin")))
+    queries = ["http://x#Heat", "http://x#Mann", "Ronin"]
+    assert mapped.top_k(queries, k=2) == built.top_k(queries, k=2)
+    # Same-type candidates first; "Heat Wave" names the answer again and is never picked
+    picks = mapped.top_k(["http://x#Heat"], k=3)[0]
+    assert set(picks) == {"Ronin", "Collateral"}
+    assert not mapped.matrix.data.flags.writeable
+    copy = pickle.loads(pickle.dumps(mapped))
+    assert copy.path == mapped.path and copy.top_k(queries, k=2) == built.top_k(queries, k=2)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import asyncio, json
+from Quiz_Service import QuizService, LINE_LIMIT
+
+def pool_rows(n):
+    return [(f"Question {i}?", ("a", "b", "c", f"answer {i}"), "Role Relation", f"s{i}", "role") for i in range(n)]
+
+class FakeService(QuizService):
+    """Pools come from pool_rows instead of MCQ_Core; `failures` generations raise first."""
+    def __init__(self, size=5, failures=0, **kw):
+        super().__init__({}, **kw)
+        self.size, self.failures, self.calls = size, failures, 0
+
+    def _generate(self, family):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("generation failed")
+        return pool_rows(self.size)
+
+def questions(items):
+    return [item["question"] for item in items]
+
+def test_replies_never_repeat_a_question():
+    async def main():
+        service = FakeService(size=5, buffer_size=4)
+        try:
+            return [await service.request("role", n=5) for _ in range(6)]
+        finally:
+            service.close()
+    for reply in asyncio.run(main()):
+        assert sorted(questions(reply)) == sorted(q for q, *_ in pool_rows(5))
+
+def test_seeded_requests_repeat_and_concurrent_ones_share_a_dispatch():
+    async def main():
+        service = FakeService(size=20)
+        try:
+            replies = await asyncio.gather(*(service.request("role", n=3, seed=7) for _ in range(10)))
+            return replies, service.stats, service.calls
+        finally:
+            service.close()
+    replies, stats, calls = asyncio.run(main())
+    assert all(r == replies[0] for r in replies)
+    assert len(set(questions(replies[0]))) == 3
+    assert calls == 1 and stats["dispatches"] == 1 and stats["requests"] == 10
+    for item in replies[0]:
+        assert item["options"][item["answer"]].startswith("answer ")
+
+def test_failed_generation_is_reported_then_retried():
+    async def main():
+        service = FakeService(failures=1)
+        try:
+            try:
+                await service.request("role", n=2)
+            except RuntimeError as e:
+                first = str(e)
+            return first, await service.request("role", n=2)
+        finally:
+            service.close()
+    first, second = asyncio.run(main())
+    assert first == "generation failed"
+    assert len(second) == 2
+
+def test_every_request_line_is_answered():
+    async def main():
+        service = FakeService()
+        server = await service.serve(port=0, warm=False)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            replies = []
+            for line in [b"not json", b"[1, 2]", b'{"family": "nope"}', b'{"family": "role", "n": 2}']:
+                writer.write(line + b"\n")
+                replies.append(json.loads(await reader.readline()))
+            writer.write(b"x" * (LINE_LIMIT + 10) + b"\n")
+            replies.append(json.loads(await reader.readline()))
+            writer.close()
+            return replies
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    bad_json, not_object, unknown, ok, too_long = asyncio.run(main())
+    assert "error" in bad_json and "error" in not_object
+    assert unknown["error"].startswith("unknown family 'nope'")
+    assert len(ok["mcqs"]) == 2
+    assert too_long == {"error": "request line too long"}
\ No newline at end of file
@@ -0,0 +1,51 @@
+import os, shutil, subprocess, sys
+import pytest
+
+pytest.importorskip("rdflib")
+pytest.importorskip("owlready2")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONTOLOGY = os.path.join(REPO_DIR, "comicBook.owl")
+
+def run(*args, hash_seed="0"):
+    env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+    proc = subprocess.run([sys.executable, *args], cwd=REPO_DIR, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+@pytest.fixture(scope="module")
+def batch_output(tmp_path_factory):
+    """generated_mcqs.csv of the batch runner (Parts A-C) and the templates it generated."""
+    root = tmp_path_factory.mktemp("runners")
+    source = root / "ontologies"
+    source.mkdir()
+    shutil.copy(ONTOLOGY, source)
+    templates = root / "batch" / "question_templates.json"
+    run("PartD_Batch_runner.py", str(source), "--out", str(root / "batch"), "--workers", "1",
+        "--templates", str(templates))
+    data = read(root / "batch" / "comicBook" / "generated_mcqs.csv")
+    assert data.count(b"\n") > 10
+    return root, str(templates), data
+
+def test_pipelined_matches_batch(batch_output):
+    root, templates, expected = batch_output
+    run("PartD_Pipelined_runner.py", ONTOLOGY, "--out", str(root / "pipelined"), "--templates", templates)
+    assert read(root / "pipelined" / "generated_mcqs.csv") == expected
+
+@pytest.mark.parametrize("shards, hash_seed", [(1, "1"), (2, "2"), (3, "12345")])
+def test_sharded_matches_batch_for_any_shard_count(batch_output, shards, hash_seed):
+    root, templates, expected = batch_output
+    out = root / f"sharded_{shards}"
+    run("PartD_Sharded_runner.py", ONTOLOGY, "--shards", str(shards), "--out", str(out), "--templates", templates,
+        hash_seed=hash_seed)
+    assert read(out / "generated_mcqs.csv") == expected
+
+def test_mcqgen_matches_batch(batch_output):
+    root, templates, expected = batch_output
+    out = root / "mcqgen"
+    run("mcqgen.py", "extract", ONTOLOGY, "--out", str(out), "--templates", templates)
+    run("mcqgen.py", "generate", str(out))
+    assert read(out / "generated_mcqs.csv") == expected
\ No newline at end of file
@@ -0,0 +1,51 @@
+import os, random, subprocess, sys
+
+from Utility_Files import ReservoirSampler, stable_hash, shard_of
+
+def make_rows(n=2000, strata=7, seed=0):
+    rng = random.Random(seed)
+    rows = [(f"s{i}", f"p{i % strata}", f"o{rng.randrange(500)}") for i in range(n)]
+    return [(row, row[1]) for row in rows]
+
+def single_pass(rows, limit, stratified=True):
+    sampler = ReservoirSampler(limit, seed=42, name="role")
+    for row, stratum in rows:
+        sampler.add(row, stratum if stratified else None)
+    return sampler
+
+def test_sample_does_not_depend_on_row_order():
+    rows = make_rows()
+    shuffled = rows[:]
+    random.Random(1).shuffle(shuffled)
+    assert single_pass(rows, 50).rows() == single_pass(shuffled, 50).rows()
+
+def test_sample_respects_limit_and_spreads_strata():
+    sample = single_pass(make_rows(), 70).rows()
+    assert len(sample) == 70
+    counts = {}
+    for _, p, _ in sample:
+        counts[p] = counts.get(p, 0) + 1
+    assert set(counts.values()) == {10}
+
+def test_merged_shard_samples_match_single_pass():
+    rows = make_rows()
+    for shards in (2, 3, 5):
+        for stratified in (True, False):
+            parts = [ReservoirSampler(50, seed=42, name="role") for _ in range(shards)]
+            for row, stratum in rows:
+                parts[shard_of(row[0], shards)].add(row, stratum if stratified else None)
+            merged = ReservoirSampler(50, seed=42, name="role")
+            for part in parts:
+                for stratum, row in part.entries():
+                    merged.add(row, stratum)
+            assert merged.rows() == single_pass(rows, 50, stratified).rows()
+
+def test_stable_hash_ignores_pythonhashseed():
+    code = "from Utility_Files import stable_hash, shard_of; print(stable_hash(42, 'role', 'a', 1), shard_of('x', 7))"
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    outputs = set()
+    for hash_seed in ("0", "1", "12345"):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        outputs.add(subprocess.run([sys.executable, "-c", code], cwd=repo, env=env, check=True,
+                                   capture_output=True, text=True).stdout)
+    assert outputs == {f"{stable_hash(42, 'role', 'a', 1)} {shard_of('x', 7)}\n"}
\ No newline at end of file
@@ -0,0 +1,55 @@
+import random
+from Star_Join import evaluate_pattern, pattern_columns, pattern_frame, role_properties, star_join
+
+PATTERN = {"family": "Director-Actor Chain", "center": "movie",
+           "roles": {"director": {"properties": ["director"]}, "actor": {"properties": ["actor", "starring"]}},
+           "answer": "actor", "limit": 60}
+OBJ_PROPS = ["http://x#hasDirector", "http://x#hasActor", "http://x#starring", "http://x#hasGenre"]
+
+def make_graph(movies=50, seed=0):
+    rng = random.Random(seed)
+    triples = {p: [] for p in OBJ_PROPS}
+    for m in range(movies):
+        triples["http://x#hasDirector"].append((f"m{m}", f"d{rng.randrange(10)}"))
+        for a in rng.sample(range(30), rng.randrange(0, 4)):
+            triples[rng.choice(["http://x#hasActor", "http://x#starring"])].append((f"m{m}", f"a{a}"))
+    return triples
+
+def naive_join(triples):
+    """Every (movie, director property, director, actor property, actor) by nested loops."""
+    rows = []
+    for dp in ["http://x#hasDirector"]:
+        for m, d in triples[dp]:
+            for ap in ["http://x#hasActor", "http://x#starring"]:
+                rows += [(m, dp, d, ap, a) for m2, a in triples[ap] if m2 == m]
+    return rows
+
+def test_roles_bind_properties_by_keyword():
+    assert role_properties(PATTERN["roles"]["actor"], OBJ_PROPS, []) == ["http://x#hasActor", "http://x#starring"]
+    assert role_properties({"properties": ["date"], "kind": "data"}, OBJ_PROPS, ["http://x#releaseDate"]) == \
+        ["http://x#releaseDate"]
+
+def test_star_join_finds_every_joined_row():
+    triples = make_graph()
+    idx = [{}, {}]
+    for i, props in enumerate([["http://x#hasDirector"], ["http://x#hasActor", "http://x#starring"]]):
+        for p in props:
+            for s, o in triples[p]:
+                idx[i].setdefault(s, []).append((p, o))
+    assert sorted(star_join(idx)) == sorted(naive_join(triples))
+    assert list(star_join([idx[0], {}])) == []
+
+def test_evaluate_pattern_samples_the_join_deterministically():
+    triples = make_graph(movies=200)
+    pairs = lambda p, is_data: iter(triples.get(p, []))
+    rows, joined = evaluate_pattern("director_actor_chain", PATTERN, pairs, OBJ_PROPS, [])
+    assert joined == len(naive_join(triples)) > PATTERN["limit"]
+    assert len(rows) == PATTERN["limit"] and set(rows) <= set(naive_join(triples))
+    again, _ = evaluate_pattern("director_actor_chain", PATTERN, pairs, OBJ_PROPS, [])
+    assert again == rows
+
+def test_pattern_frame_labels_object_roles():
+    rows = [("m1", "http://x#hasDirector", "d1", "http://x#hasActor", "a1")]
+    df = pattern_frame(PATTERN, rows, lambda x: x.upper())
+    assert list(df.columns[:5]) == pattern_columns(PATTERN)
+    assert df.loc[0, "movie_label"] == "M1" and df.loc[0, "actor_label"] == "A1" and df.loc[0, "director_label"] == "D1"
\ No newline at end of file
@@ -0,0 +1,53 @@
+import json, os
+import pytest
+
+from Template_Registry import TemplateRegistry, TemplateError, CompiledTemplate, compile_registry
+
+FIELDS = {"role": ["subject", "property"], "actor": ["movie"]}
+TEMPLATES = {"role": ["What is the {property} of {subject}?", "{subject} has which {property}?"],
+             "actor": ["Name an actor from {movie}."]}
+
+def test_valid_templates_compile_and_render():
+    reg = TemplateRegistry(TEMPLATES, FIELDS)
+    values = [{"subject": "Heat", "property": "director"}] * 3
+    texts = reg.render("role", values, [("m1", "p", "a"), ("m2", "p", "a"), ("m3", "p", "a")])
+    assert set(texts) <= {"What is the director of Heat?", "Heat has which director?"}
+    assert reg.render("actor", [{"movie": "Heat"}], [("m1",)]) == ["Name an actor from Heat."]
+
+def test_unknown_slot_raises():
+    bad = dict(TEMPLATES, actor=["Name an actor from {film}."])
+    with pytest.raises(TemplateError, match="film"):
+        TemplateRegistry(bad, FIELDS)
+
+@pytest.mark.parametrize("text", ["Name an actor from {movie.", "Name an actor from movie}.", "Who is {0}?",
+                                  "Who is {movie[0]}?"])
+def test_broken_braces_and_non_name_slots_raise(text):
+    with pytest.raises(TemplateError):
+        TemplateRegistry(dict(TEMPLATES, actor=[text]), FIELDS)
+
+def test_family_without_templates_raises():
+    with pytest.raises(TemplateError, match="no question templates"):
+        TemplateRegistry({"role": TEMPLATES["role"]}, FIELDS)
+
+def test_literal_braces_survive():
+    assert CompiledTemplate("{{ {movie} }}").render({"movie": "Heat"}) == "{ Heat }"
+
+def test_variant_choice_is_stable_and_order_free():
+    reg = TemplateRegistry(TEMPLATES, FIELDS)
+    ids = [(f"m{i}", "p", "a") for i in range(50)]
+    choices = reg.choices("role", ids)
+    assert reg.choices("role", ids[::-1]) == choices[::-1]
+    assert set(choices) == {0, 1}
+
+def test_compile_registry_caches_by_content():
+    assert compile_registry(TEMPLATES, FIELDS) is compile_registry(json.loads(json.dumps(TEMPLATES)), FIELDS)
+
+def test_shipped_templates_are_valid():
+    import MCQ_Core as core
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(repo, "PartB_Template_generator.py"), encoding="utf-8") as f:
+        source = f.read()
+    session = {"__name__": "__main__"}
+    # Only the template definitions (the rest of the cell writes the JSON files)
+    exec(compile(source.split("def write_if_changed")[0], "PartB_Template_generator.py", "exec"), session)
+    TemplateRegistry(session["question_templates"], core.template_fields(session["composite_patterns"]))
\ No newline at end of file